@@ -1,118 +1,517 @@
-import time, os, random, serial, subprocess
-import RPi.GPIO as GPIO
+#!/usr/bin/env python3
+# Host controller for the celebration hole.
+#
+#   python3 GolfCelebration.py
+#
+# Runs as one asyncio event loop: sensor sampling, detection, serial I/O
+# to the Pico, audio playback and logging are separate coroutines, and
+# celebration cues are timed callbacks on the same loop. Ctrl-C / SIGTERM
+# cancel everything and leave the strip off. With SENSOR_BACKEND = 'replay'
+# a recorded trace is run through the same detection path on a virtual
+# clock instead.
+import asyncio, time, os, signal
+from sensor import SimulatedGPIO, make_sensor
+from sampler import RingBuffer, Sampler
+from detect import make_detector
+from sensortrace import TraceRecorder, ReplaySensor, VirtualClock
+from scheduler import CelebrationScheduler, LoopTimers
+from metrics import Stat
+from audio import AudioBank
+from audiocache import AudioCache, DEFAULT_DIR as AUDIO_CACHE_DIR
+from clipwatch import watch as watch_clips
+from audioengine import AudioEngine, AplaySink, FailoverSink, NullSink, WavFileSink
+from envelope import EnvelopeFollower
+from audiooutput import AudioOutputManager
+from leds import LightShow, SpiStrip, NullStrip, PicoStrip, Fairway
+from timeline import load_timelines
+from animation import Animation
+from picolink import PicoLink
+import picoproto
 
 # ───────── USER SETTINGS ───────────────────────────────────────────
 DETECT_CM        = 5          # Distance to count as ball in hole
 CONSEC_HITS_N    = 2          # Hits under threshold to trigger
+DETECTOR         = 'hysteresis' # 'streak', 'median', 'ema' or 'hysteresis'
+HYSTERESIS_CM    = 3            # Ball must read > DETECT_CM + this to re-arm
 COOLDOWN_SEC     = 5          # Debounce to avoid retriggers
 CELEBRATION_SEC  = 10         # How long the celebration lasts
+CELEBRATION_POLICY = 'extend'   # Sink during a show: 'coalesce', 'extend' or 'queue'
 AUDIO_DIR        = '/home/TestPi/golf_sounds'  # Folder with .wav files
+AUDIO_DIRS       = [os.path.dirname(os.path.abspath(__file__)), AUDIO_DIR]  # All decoded at startup
+AUDIO_CACHE      = AUDIO_CACHE_DIR  # Normalised clips, keyed by content hash (None = off)
+AUDIO_MMAP       = True         # Memory-map cached clips instead of holding them all in RAM
+AUDIO_RESIDENT   = 16           # Recently played clips kept paged in (AUDIO_MMAP)
+AUDIO_WATCH      = True         # Pick up clips added/removed while running
+AUDIO_WATCH_SEC  = 5            # Rescan interval when inotify is unavailable
+AUDIO_SINK       = 'aplay'      # 'aplay', 'null', or a path ending in .wav to record
+AUDIO_OUTPUTS    = [            # 'aplay' sink: (name, ALSA device) best first, all kept open
+    ('bluetooth', 'default'),                   # PulseAudio default = BT speaker once up
+    ('usb',       'plughw:CARD=Device'),
+    ('3.5mm',     'plughw:CARD=Headphones'),
+    ('null',      None),                        # keeps the engine running with no output
+]
+AUDIO_STALL_SEC  = 0.25         # A write blocked this long counts as a dead output
+AUDIO_PERIOD     = 256          # Frames per block (smaller = lower latency, more CPU)
+AUDIO_PERIODS    = 4            # Blocks of device buffering
+BT_SPEAKER_MAC   = None         # e.g. "FC:58:FA:D7:0B:82" to bring up a Bluetooth speaker
+BT_SINK_NAME     = None         # Sink to wait for (default: any sink with the MAC in its name)
+BT_OUTPUT        = 'bluetooth'  # The AUDIO_OUTPUTS entry that plays through the speaker
+LIGHT_MODE       = 'beat'       # 'beat' (lights follow the clip) or 'pattern' (Pico's own show)
+CLAP_BED_GAIN    = 0.4          # Mix a random clap under taunts/cheers (0 = off)
+LOG_FILE         = None         # Append log lines here as well as printing them
+LED_BACKEND      = 'pico'       # 'pico' (USB serial), 'stream' (frames to the Pico), 'spi' (GPIO 10) or 'null'
+NUM_LEDS         = 100          # Strip length for 'stream' / 'spi' / 'null'
+LED_BRIGHTNESS   = 0.6
+LED_FPS          = 60
+LED_CELEBRATION  = 'classic'    # Timeline from celebrations.json (not for 'pico'), or a .gani file
 PICO_SERIAL_PORT = '/dev/ttyACM0'              # USB serial port to Pico
 PICO_BAUDRATE    = 115200
+PICO_COLOR       = (255, 255, 0)              # Celebration colour on the Pico
+SENSOR_MODE      = 'poll'       # 'poll' (busy-wait, exact) or 'edge' (GPIO callbacks, less CPU, more jitter)
+SENSOR_BACKEND   = 'rpi'        # 'rpi' (real pins), 'sim' (fake HC-SR04) or 'replay'
+TRACE_FILE       = None         # Record every reading here; 'replay' plays it back
+SAMPLE_HZ        = 15           # Sensor pings per second (HC-SR04 needs ≥60 ms)
+SAMPLE_BUFFER    = 1024         # Readings kept in the ring buffer
+STATS_SEC        = 60           # How often to log loop lag / latency figures
 # -------------------------------------------------------------------
 
+REPLAY = SENSOR_BACKEND == 'replay'
+TRIG, ECHO = 23, 19
+
+loop_lag      = Stat("loop lag")
+light_latency = Stat("sink→light")
+last_sink = float('-inf')       # sample time of the sink being celebrated
+
+# ───────── LOGGING ─────────────────────────────────────────────────
+# log() never blocks: lines are queued and written by the logger task.
+log_queue = None
+
+def log(msg):
+    line = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {msg}"
+    if log_queue is None:
+        print(line)
+    else:
+        log_queue.put_nowait(line)
+
+def _append_log(lines):
+    with open(LOG_FILE, "a") as f:
+        f.write("\n".join(lines) + "\n")
+
+async def logger():
+    while True:
+        lines = [await log_queue.get()]
+        while not log_queue.empty():
+            lines.append(log_queue.get_nowait())
+        print("\n".join(lines))
+        if LOG_FILE:
+            await asyncio.to_thread(_append_log, lines)
+
 # ───────── AUDIO ───────────────────────────────────────────────────
-def play_random_sound():
+# Every clip is decoded (or memory-mapped) at startup. One engine thread
+# owns the output for the whole run and takes play/stop commands from a
+# queue, so a celebration costs no process spawn or device open. A folder
+# watcher keeps the bank in step with AUDIO_DIRS while the game runs.
+bank = None
+engine = None
+watcher = None
+speaker = None
+
+def make_sink():
+    if AUDIO_SINK == 'null':
+        return NullSink(period=AUDIO_PERIOD, periods=AUDIO_PERIODS)
+    if AUDIO_SINK.endswith('.wav'):
+        return WavFileSink(AUDIO_SINK, period=AUDIO_PERIOD, periods=AUDIO_PERIODS, realtime=True)
+    outputs = [(name, AplaySink(device, period=AUDIO_PERIOD, periods=AUDIO_PERIODS) if device
+                else NullSink(period=AUDIO_PERIOD, periods=AUDIO_PERIODS))
+               for name, device in AUDIO_OUTPUTS]
+    return FailoverSink(outputs, stall=AUDIO_STALL_SEC)
+
+def open_audio():
+    global bank, engine
+    if BT_SPEAKER_MAC and not REPLAY:
+        start_speaker(asyncio.get_running_loop())
+    cache = AudioCache(AUDIO_CACHE) if AUDIO_CACHE else None
+    bank = AudioBank(AUDIO_DIRS, cache=cache, mmap=AUDIO_MMAP, resident=AUDIO_RESIDENT,
+                     envelopes=LIGHT_MODE == 'beat')
+    log(f"🎵 Loaded {len(bank)} clips ({sum(c.duration for c in bank.clips.values()):.0f} s of audio)"
+        + (f", {cache.misses} newly processed" if cache else ""))
+    if REPLAY:
+        return
+    if AUDIO_WATCH:
+        start_watcher(asyncio.get_running_loop())
     try:
-        clips = [f for f in os.listdir(AUDIO_DIR) if f.endswith('.wav')]
-        if not clips:
-            print(f"⚠️ No .wav files found in {AUDIO_DIR}")
-            return
-        chosen = random.choice(clips)
-        full_path = os.path.join(AUDIO_DIR, chosen)
-        print(f"🔊 Playing via shell: {full_path}")
-
-        command = f"aplay '{full_path}'"
-        result = subprocess.run(
-            command,
-            shell=True,
-            executable="/bin/bash",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env=os.environ  # inherit full environment including XDG_RUNTIME_DIR
-        )
-
-        if result.returncode != 0:
-            print(f"⚠️ aplay error:\n{result.stderr}")
-        else:
-            print("✅ aplay playback succeeded.")
+        engine = AudioEngine(make_sink(), AUDIO_PERIOD)
+        engine.start()
+    except Exception as e:
+        log(f"❌ Could not open audio output: {e}")
+        engine = None
 
+# The speaker connects while clips load; when its sink appears it becomes
+# the default and the engine reopens onto it. Callbacks come from the
+# pactl event thread.
+def start_speaker(loop):
+    global speaker
+    def ready(sink):
+        if engine:
+            engine.reopen()
+        loop.call_soon_threadsafe(log, f"🔊 Speaker ready after {speaker.startup:.2f} s: {sink}")
+    def lost(sink):
+        if engine and isinstance(engine.sink, FailoverSink):
+            engine.sink.fail(BT_OUTPUT)
+        loop.call_soon_threadsafe(log, f"⚠️ Speaker sink gone: {sink}")
+    speaker = AudioOutputManager(BT_SPEAKER_MAC, BT_SINK_NAME, on_ready=ready, on_lost=lost)
+    try:
+        speaker.start()
     except Exception as e:
-        print(f"⚠️ Exception during sound playback: {e}")
+        log(f"❌ Could not start speaker bring-up: {e}")
+        speaker = None
 
+# Watcher callbacks run on its own thread; logging goes back via the loop
+def start_watcher(loop):
+    global watcher
+    def added(path):
+        clip = bank.add(path)
+        if clip:
+            loop.call_soon_threadsafe(log, f"🎵 New clip: {clip.name} ({clip.category})")
+    def removed(path):
+        clip = bank.remove(path)
+        if clip:
+            loop.call_soon_threadsafe(log, f"🗑️ Clip removed: {clip.name}")
+    dirs = [d for d in AUDIO_DIRS if os.path.isdir(d)]
+    watcher = watch_clips(dirs, added, removed, AUDIO_WATCH_SEC)
+    log(f"👀 Watching {len(dirs)} audio folder(s) ({type(watcher).__name__})")
 
+def close_audio():
+    if watcher:
+        watcher.stop()
+    if speaker:
+        speaker.close()
+    if engine:
+        engine.close()
 
-# ───────── SENSOR SETUP ────────────────────────────────────────────
-TRIG, ECHO = 23, 19
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(TRIG, GPIO.OUT)
-GPIO.setup(ECHO, GPIO.IN)
-
-def get_distance_cm(timeout=0.05):
-    GPIO.output(TRIG, False)
-    time.sleep(0.05)
-    GPIO.output(TRIG, True); time.sleep(1e-5); GPIO.output(TRIG, False)
-
-    t0 = time.time()
-    while GPIO.input(ECHO) == 0:
-        if time.time() - t0 > timeout: return None
-    start = time.time()
-    while GPIO.input(ECHO) == 1:
-        if time.time() - start > timeout: return None
-    return (time.time() - start) * 17150
-
-# ───────── PICO SERIAL SETUP ───────────────────────────────────────
-try:
-    pico = serial.Serial(PICO_SERIAL_PORT, PICO_BAUDRATE, timeout=1)
-    print(f"✅ Connected to Pico at {PICO_SERIAL_PORT}")
-except Exception as e:
-    print(f"❌ Could not connect to Pico: {e}")
-    pico = None
-
-def send_to_pico(message):
-    if pico and pico.is_open:
+def play_random_sound():
+    if REPLAY:
+        log("🔇 Replay: audio skipped")
+        return None
+    clip = bank.pick() if bank else None
+    if clip is None:
+        log(f"⚠️ No playable clips in {AUDIO_DIRS}")
+        return None
+    if engine is None:
+        log(f"⚠️ Audio output not open ({clip.name})")
+        return None
+    engine.play(clip, at=last_sink)
+    log(f"🔊 Playing: {clip.name}")
+    bed = bank.pick('claps') if CLAP_BED_GAIN and clip.category != 'claps' else None
+    if bed:
+        engine.overlay(bed, CLAP_BED_GAIN, at=last_sink)
+        log(f"👏 Under it: {bed.name} at {CLAP_BED_GAIN:.0%}")
+    return clip
+
+def stop_sound():
+    if engine:
+        engine.stop()
+
+# ───────── PICO SERIAL ─────────────────────────────────────────────
+# send_to_pico() queues a cue ("celebrate", "lv 120", ...); pico_writer()
+# sends it as a picoproto packet on a worker thread so the loop never
+# waits on USB. Mode changes wait for the Pico's ACK (resent if lost);
+# the high-rate light cues are fire-and-forget.
+pico = None
+pico_queue = None
+
+def open_pico(loop):
+    global pico
+    if REPLAY:
+        return
+    def said(line):
         try:
-            pico.write(f"{message.strip()}\n".encode())
-            print(f"📤 Sent to Pico: {message.strip()}")
-        except Exception as e:
-            print(f"⚠️ Error writing to Pico: {e}")
+            loop.call_soon_threadsafe(log, f"🍓 Pico: {line}")
+        except RuntimeError:
+            pass                            # loop already closed
+    try:
+        pico = PicoLink(PICO_SERIAL_PORT, PICO_BAUDRATE, on_text=said)
+        log(f"✅ Connected to Pico at {PICO_SERIAL_PORT}")
+    except Exception as e:
+        log(f"❌ Could not connect to Pico: {e}")
+        pico = None
+
+def pico_packet(message):
+    if message.startswith("lv "):
+        return picoproto.LEVEL, bytes((int(message[3:]),)), False
+    if message == "flash":
+        return picoproto.FLASH, b'', False
+    if message == "stats":
+        return picoproto.STATS, b'', False
+    effect = picoproto.EFFECTS[message]
+    if effect == picoproto.CELEBRATE:
+        payload = picoproto.play(effect, int(CELEBRATION_SEC * 1000), PICO_COLOR, round(LED_BRIGHTNESS * 255))
+    else:
+        payload = picoproto.play(effect, brightness=round(LED_BRIGHTNESS * 255))
+    return picoproto.PLAY, payload, True
+
+# quiet=True for the high-rate light cues, which would flood the log
+def send_to_pico(message, quiet=False):
+    if not (pico and pico.is_open):
+        if not quiet:
+            log(f"⚠️ Pico serial not open ({message.strip()})")
+    elif pico_queue is not None:
+        pico_queue.put_nowait((message.strip(), quiet))
     else:
-        print("⚠️ Pico serial not open")
+        note = _write_pico(message.strip(), quiet)
+        if note:
+            log(note)
+
+# Runs on a worker thread, so it hands its log line back rather than
+# touching log_queue (asyncio queues aren't thread-safe)
+def _write_pico(message, quiet=False):
+    try:
+        kind, payload, ack = pico_packet(message)
+        if not ack:
+            pico.send(kind, payload)
+        elif not pico.request(kind, payload):
+            return f"⚠️ Pico did not acknowledge: {message}"
+        if not quiet:
+            return f"📤 Sent to Pico: {message}"
+    except Exception as e:
+        return f"⚠️ Error writing to Pico: {e}"
 
-# ───────── MAIN LOOP ───────────────────────────────────────────────
-print(f"🎯 System ready. Need {CONSEC_HITS_N} hits < {DETECT_CM} cm.")
-send_to_pico("idle")
-last_celebration = 0
-hit_streak = 0
+# ───────── LIGHTS ──────────────────────────────────────────────────
+# set_lights() goes to the Pico over serial, or with a local strip to a
+# LightShow thread that renders effects on a fixed-rate frame clock, so a
+# celebration lasts CELEBRATION_SEC whatever the strip length. The
+# celebration is a timeline compiled to frames at startup (and cached),
+# or a pre-rendered .gani animation streamed from disk (animation.py).
+light_show = None
+celebration_frames = None
 
-try:
+def open_lights():
+    global light_show, celebration_frames
+    if LED_BACKEND == 'pico' or REPLAY:
+        return
+    try:
+        if LED_CELEBRATION.endswith('.gani'):
+            celebration_frames = Animation(LED_CELEBRATION)
+            if celebration_frames.n != NUM_LEDS:
+                raise ValueError(f"{LED_CELEBRATION} is for {celebration_frames.n} LEDs, not {NUM_LEDS}")
+        else:
+            celebration_frames = load_timelines()[LED_CELEBRATION].compile(NUM_LEDS, LED_FPS, CELEBRATION_SEC)
+        if LED_BACKEND == 'spi':
+            strip = SpiStrip(NUM_LEDS, LED_BRIGHTNESS)
+        elif LED_BACKEND == 'stream':
+            if not (pico and pico.is_open):
+                raise IOError("Pico serial not open")
+            strip = PicoStrip(NUM_LEDS, pico.send, LED_BRIGHTNESS, request=pico.request)
+        else:
+            strip = NullStrip(NUM_LEDS)
+    except Exception as e:
+        log(f"❌ Could not set up LED strip: {e}")
+        return
+    light_show = LightShow(strip, NUM_LEDS, LED_FPS, idle=Fairway())
+    light_show.start()
+    log(f"💡 {NUM_LEDS} LEDs on {LED_BACKEND} at {LED_FPS} FPS, celebration '{LED_CELEBRATION}'")
+
+def close_lights():
+    if light_show:
+        light_show.close()
+
+def set_lights(mode):
+    if light_show is None:
+        send_to_pico(mode)
+    elif mode == 'celebrate':
+        light_show.play(celebration_frames, CELEBRATION_SEC)
+    elif mode == 'idle':
+        light_show.idle()
+    elif mode == 'off':
+        light_show.off()
+
+def lights_stat():
+    lights = f"lights: {light_show.clock} | strip: {light_show.strip.rates()}" if light_show else str(light_latency)
+    return f"{lights} | {pico}" if pico else lights
+
+async def pico_writer():
+    while True:
+        message, quiet = await pico_queue.get()
+        note = await asyncio.to_thread(_write_pico, message, quiet)
+        if note:
+            log(note)
+        if message in ("celebrate", "beat"):
+            light_latency.add(time.monotonic() - last_sink)
+
+def audio_stat():
+    return engine.latency if engine else "trigger→audio: -"
+
+# ───────── CELEBRATIONS ────────────────────────────────────────────
+# In 'beat' mode the Pico just renders: brightness ("lv N") and flashes
+# come from the clip's precomputed envelope, timed to when it is heard.
+lights = None
+
+def start_celebration():
+    clip = play_random_sound()
+    if LIGHT_MODE == 'beat' and light_show is None and clip and clip.envelope is not None:
+        send_to_pico("beat")
+        lights.start(clip.envelope, engine.sink.latency)
+    else:
+        set_lights("celebrate")
+
+def stop_show():
+    if lights:
+        lights.stop()
+    stop_sound()
+
+def end_celebration():
+    stop_show()
+    set_lights("idle")
+
+def make_show(timers):
+    global lights
+    lights = EnvelopeFollower(timers,
+                              level=lambda v: send_to_pico(f"lv {v}", quiet=True),
+                              flash=lambda: send_to_pico("flash", quiet=True))
+    return CelebrationScheduler(
+        timers,
+        cues=[(0, start_celebration)],
+        end=end_celebration,
+        stop=stop_show,
+        duration=CELEBRATION_SEC,
+        policy=CELEBRATION_POLICY,
+    )
+
+# ───────── DETECTION ───────────────────────────────────────────────
+# Shared by the live loop and the replay: feed new ring-buffer readings
+# through the detector and hand any sink to the show scheduler.
+class Detection:
+    def __init__(self, samples, show):
+        self.samples, self.show = samples, show
+        self.detector = make_detector(DETECTOR, DETECT_CM, CONSEC_HITS_N, HYSTERESIS_CM)
+        self.seq = 0
+        self.sinks = []
+
+    def poll(self):
+        global last_sink
+        batch, self.seq = self.samples.since(self.seq)
+        for now, dist, status in batch:
+            if self.detector.update(dist) and now - last_sink > COOLDOWN_SEC:
+                last_sink = now
+                outcome = self.show.trigger()
+                self.sinks.append((now, outcome))
+                log(f"🎉 Ball detected at {dist:.1f} cm! Celebration {outcome}.")
+        return batch
+
+# ───────── ASYNC RUNTIME ───────────────────────────────────────────
+async def sample_loop(sampler, detection):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
     while True:
-        dist = get_distance_cm()
-        valid = dist is not None and 1 < dist < 400
-        txt = "None" if dist is None else f"{dist:5.1f} cm"
-        print(txt, end="\r")
-
-        now = time.time()
-        if valid and dist < DETECT_CM:
-            hit_streak += 1
+        # The read blocks for the echo, so it runs on a worker thread
+        await asyncio.to_thread(sampler.step)
+        batch = detection.poll()
+        if batch:
+            dist = batch[-1][1]
+            txt = "None" if dist is None else f"{dist:5.1f} cm"
+            print(f"{txt}  ({detection.samples.rate():4.1f} samples/s)", end="\r")
+
+        deadline += sampler.period
+        delay = deadline - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
         else:
-            hit_streak = 0
-
-        if hit_streak >= CONSEC_HITS_N and now - last_celebration > COOLDOWN_SEC:
-            print(f"\n🎉 Ball detected at {dist:.1f} cm! Celebrating.")
-            send_to_pico("celebrate")
-            play_random_sound()
-            time.sleep(CELEBRATION_SEC)
-            send_to_pico("idle")
-            last_celebration = time.time()
-            hit_streak = 0
-
-        time.sleep(0.05)
-
-except KeyboardInterrupt:
-    GPIO.cleanup()
-    if pico and pico.is_open:
-        send_to_pico("off")
-        pico.close()
-    print("\n🔚 Exiting cleanly.")
+            deadline = loop.time()
+
+# How late the loop wakes up versus when it asked to: anything that
+# blocks the loop shows up here directly.
+async def lag_monitor(interval=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        loop_lag.add(max(0.0, loop.time() - start - interval))
+
+async def stats_reporter():
+    while True:
+        await asyncio.sleep(STATS_SEC)
+        log(f"📈 {loop_lag} | {lights_stat()} | {audio_stat()}")
+        send_to_pico("stats", quiet=True)   # the Pico answers with its own line
+
+async def run():
+    global log_queue, pico_queue
+    loop = asyncio.get_running_loop()
+    log_queue, pico_queue = asyncio.Queue(), asyncio.Queue()
+    main_task = asyncio.current_task()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, main_task.cancel)
+
+    if SENSOR_BACKEND == 'sim':
+        GPIO = SimulatedGPIO(TRIG, ECHO)
+    else:
+        import RPi.GPIO as GPIO
+    GPIO.setmode(GPIO.BCM)
+    sensor = make_sensor(SENSOR_MODE, GPIO, TRIG, ECHO)
+    recorder = TraceRecorder(TRACE_FILE) if TRACE_FILE else None
+    samples = RingBuffer(SAMPLE_BUFFER)
+    # sample_loop paces the pings itself, so no settle sleep per read
+    sampler = Sampler(lambda: sensor.read(settle=0), samples, SAMPLE_HZ, recorder=recorder)
+
+    open_pico(loop)
+    open_lights()
+    open_audio()
+    show = make_show(LoopTimers(loop))
+    detection = Detection(samples, show)
+    log(f"🎯 System ready. {DETECTOR} detector, trigger < {DETECT_CM} cm.")
+    set_lights("idle")
+
+    tasks = [asyncio.create_task(coro) for coro in (
+        logger(), pico_writer(), sample_loop(sampler, detection),
+        lag_monitor(), stats_reporter())]
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        show.cancel()
+        while not log_queue.empty():
+            print(log_queue.get_nowait())
+        log_queue = pico_queue = None       # from here on, write directly
+        if recorder:
+            recorder.close()
+        sensor.close()
+        GPIO.cleanup()
+        close_audio()
+        close_lights()
+        if pico and pico.is_open:
+            send_to_pico("off")
+            pico.close()
+        log(f"📈 {loop_lag} | {lights_stat()} | {audio_stat()}")
+        print("\n🔚 Exiting cleanly.")
+
+# ───────── REPLAY ──────────────────────────────────────────────────
+# Same sampler → detector → scheduler path, but on a VirtualClock with the
+# sensor swapped for a recorded trace, so it runs far faster than real time.
+def replay():
+    clock = VirtualClock()
+    sensor = ReplaySensor(TRACE_FILE)
+    samples = RingBuffer(SAMPLE_BUFFER)
+    sampler = Sampler(sensor.read, samples, SAMPLE_HZ, clock.time)
+    sensor.schedule(clock, sampler.step)
+    show = make_show(clock)
+    detection = Detection(samples, show)
+
+    while not sensor.done:
+        detection.poll()
+        clock.sleep(0.05)
+    show.cancel()
+    print(f"⏪ Replay done: {samples.count} readings, {len(detection.sinks)} sinks "
+          f"at {', '.join(f'{t:.1f}s ({o})' for t, o in detection.sinks) or '-'}")
+
+# ───────── ENTRY POINT ─────────────────────────────────────────────
+def main():
+    if REPLAY:
+        replay()
+    else:
+        asyncio.run(run())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Pre-rendered LED animations. Any effect (or compiled timeline) can be
+# rendered offline to a .gani file and played back later by handing
+# memoryview slices of the memory-mapped file straight to the strip, so
+# playback renders nothing and a long animation never sits in RAM.
+#
+#   header  '<4sBBHHI2x'  b'GANI', version, flags, num_leds, fps, frames
+#   raw     frames × num_leds × 3 bytes, GRB
+#   delta   (flags & DELTA) (frames + 1) uint32 offsets into the data, then
+#           per frame: u16 span count, spans of (u16 first LED, u16 count,
+#           count × 3 GRB bytes) – only the LEDs that changed since the
+#           previous frame (frame 0 against all-off)
+#
+#   python3 animation.py render NAME OUT.gani [--leds 100] [--fps 60] [--seconds 10] [--delta]
+#   python3 animation.py info FILE.gani
+import mmap, struct
+import numpy as np
+from leds import new_frame, changed_spans, GRB
+
+MAGIC, VERSION = b'GANI', 1
+HEADER = struct.Struct('<4sBBHHI2x')
+SPAN = struct.Struct('<HH')
+DELTA = 0x01
+
+# ───────── WRITING ─────────────────────────────────────────────────
+def write_animation(path, effect, n, fps, seconds, delta=False):
+    count = int(round(seconds * fps))
+    frame = new_frame(n)
+    order = list(GRB)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, DELTA if delta else 0, n, fps, count))
+        if not delta:
+            for i in range(count):
+                effect(frame, i / fps)
+                f.write(frame[:, order].tobytes())
+            return
+        index_at = f.tell()
+        f.write(bytes(4 * (count + 1)))
+        offsets, pos = [], 0
+        prev = new_frame(n)
+        for i in range(count):
+            effect(frame, i / fps)
+            grb = frame[:, order]
+            spans = changed_spans(prev, grb)    # a span header costs 4 bytes ≈ 1 LED
+            record = [struct.pack('<H', len(spans))]
+            for a, b in spans:
+                record += [SPAN.pack(a, b - a), grb[a:b].tobytes()]
+            record = b''.join(record)
+            offsets.append(pos)
+            f.write(record)
+            pos += len(record)
+            prev = grb
+        offsets.append(pos)
+        f.seek(index_at)
+        f.write(np.array(offsets, '<u4').tobytes())
+
+# ───────── PLAYBACK ────────────────────────────────────────────────
+# grb(t) gives the frame due at t as a GRB memoryview: a slice of the
+# mapping for raw files, or a buffer patched in place for delta files.
+# With raw = True a LightShow hands that straight to strip.write_raw();
+# called as an ordinary effect it fills an RGB frame instead.
+class Animation:
+    raw = True
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, self.flags, self.n, self.fps, self.frames = HEADER.unpack_from(self.view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a v{VERSION} .gani animation")
+        self.frame_bytes = self.n * 3
+        self.delta = bool(self.flags & DELTA)
+        if self.delta:
+            self.index = np.frombuffer(self.view, '<u4', self.frames + 1, HEADER.size)
+            self.data = HEADER.size + 4 * (self.frames + 1)
+            self.buf = bytearray(self.frame_bytes)
+            self.at = -1                    # last frame applied to buf
+
+    @property
+    def duration(self):
+        return self.frames / self.fps
+
+    def _apply(self, i):
+        pos = self.data + int(self.index[i])
+        spans, = struct.unpack_from('<H', self.view, pos)
+        pos += 2
+        for _ in range(spans):
+            first, count = SPAN.unpack_from(self.view, pos)
+            pos += SPAN.size
+            self.buf[first * 3:(first + count) * 3] = self.view[pos:pos + count * 3]
+            pos += count * 3
+
+    def grb(self, t):
+        i = min(int(t * self.fps), self.frames - 1)
+        if not self.delta:
+            start = HEADER.size + i * self.frame_bytes
+            return self.view[start:start + self.frame_bytes]
+        if i < self.at:                     # went backwards: replay from the start
+            self.buf[:] = bytes(self.frame_bytes)
+            self.at = -1
+        for j in range(self.at + 1, i + 1):
+            self._apply(j)
+        self.at = i
+        return memoryview(self.buf)
+
+    def __call__(self, frame, t):
+        frame[:] = np.frombuffer(self.grb(t), np.uint8).reshape(-1, 3)[:, list(GRB)]
+
+    def close(self):
+        if self.delta:
+            del self.index
+        self.view.release()
+        self.map.close()
+
+if __name__ == '__main__':
+    import argparse, os
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    r = sub.add_parser('render')
+    r.add_argument('name', help="timeline name from celebrations.json")
+    r.add_argument('out')
+    r.add_argument('--leds', type=int, default=100)
+    r.add_argument('--fps', type=int, default=60)
+    r.add_argument('--seconds', type=float, default=10)
+    r.add_argument('--delta', action='store_true')
+    i = sub.add_parser('info')
+    i.add_argument('file')
+    args = ap.parse_args()
+
+    if args.cmd == 'render':
+        from timeline import load_timelines
+        show = load_timelines()[args.name].compile(args.leds, args.fps, args.seconds, cache_dir=None)
+        write_animation(args.out, show, args.leds, args.fps, args.seconds, args.delta)
+        args.file = args.out
+    anim = Animation(args.file)
+    raw = anim.frames * anim.frame_bytes
+    size = os.path.getsize(args.file)
+    print(f"✅ {args.file}: {anim.n} LEDs, {anim.frames} frames at {anim.fps} FPS "
+          f"({anim.duration:.1f} s), {'delta' if anim.delta else 'raw'}, "
+          f"{size / 1024:.0f} KiB ({100 * size / (raw + HEADER.size):.0f}% of raw)")
+    anim.close()
@@ -0,0 +1,220 @@
+import mmap, os, random, struct, subprocess, threading, wave
+from collections import OrderedDict
+import numpy as np
+from envelope import analyze
+
+# Every clip is decoded to this format once, at startup
+RATE, CHANNELS = 44100, 2
+
+# Clip files picked up from AUDIO_DIRS; anything but PCM WAV goes through ffmpeg
+CLIP_EXTENSIONS = ('.wav', '.mp3', '.ogg', '.oga', '.opus', '.flac', '.m4a', '.aac', '.webm')
+
+# Filename keyword → category, first match wins
+CATEGORIES = (('clap', 'claps'), ('cheer', 'cheers'), ('taunt', 'taunts'), ('putt', 'putts'))
+
+def categorize(name):
+    name = name.lower()
+    for key, category in CATEGORIES:
+        if key in name:
+            return category
+    return 'misc'
+
+# ───────── DECODING ────────────────────────────────────────────────
+# PCM WAVs are read with the wave module; anything else (e.g. a .wav that
+# is really WebM/Opus) goes through ffmpeg. Result: int16 (frames, channels).
+def _pcm_to_int16(raw, width):
+    if width == 1:
+        return (np.frombuffer(raw, np.uint8).astype(np.int16) - 128) << 8
+    if width == 2:
+        return np.frombuffer(raw, '<i2').copy()
+    if width == 3:
+        b = np.frombuffer(raw, np.uint8).reshape(-1, 3)
+        return ((b[:, 2].astype(np.int8).astype(np.int16) << 8) | b[:, 1]).astype(np.int16)
+    if width == 4:
+        return (np.frombuffer(raw, '<i4') >> 16).astype(np.int16)
+    raise ValueError(f"unsupported sample width {width}")
+
+def _ffmpeg_decode(path, rate, channels):
+    out = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', path, '-f', 's16le', '-acodec', 'pcm_s16le',
+         '-ac', str(channels), '-ar', str(rate), '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return np.frombuffer(out.stdout, '<i2').reshape(-1, channels)
+
+def convert(pcm, src_rate, rate=RATE, channels=CHANNELS):
+    if pcm.shape[1] != channels:
+        pcm = np.repeat(pcm.mean(axis=1, keepdims=True), channels, axis=1)
+    if src_rate != rate and len(pcm):
+        n = int(round(len(pcm) * rate / src_rate))
+        src_t = np.arange(len(pcm)) / src_rate
+        dst_t = np.arange(n) / rate
+        pcm = np.stack([np.interp(dst_t, src_t, pcm[:, c]) for c in range(channels)], axis=1)
+    return np.ascontiguousarray(pcm, dtype=np.int16)
+
+def decode(path, rate=RATE, channels=CHANNELS):
+    try:
+        with wave.open(path, 'rb') as w:
+            src_channels, width, src_rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+            raw = w.readframes(w.getnframes())
+    except (wave.Error, EOFError):
+        return _ffmpeg_decode(path, rate, channels)
+    pcm = _pcm_to_int16(raw, width).reshape(-1, src_channels)
+    return convert(pcm, src_rate, rate, channels)
+
+# ───────── MEMORY MAPPING ──────────────────────────────────────────
+# Map the sample data of a 16-bit PCM WAV already in the output format
+# (e.g. a cache entry) as a read-only int16 (frames, channels) array. Pages
+# are read on first touch and shared with the page cache, so an idle clip
+# costs no RSS. Returns None for anything that would need converting.
+def map_wav(path, rate=RATE, channels=CHANNELS):
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            return None
+        fmt = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                return None
+            cid, size = struct.unpack('<4sI', head)
+            if cid == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif cid == b'data':
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+        offset = f.tell()
+    if not fmt or fmt[0] not in (1, 0xFFFE) or fmt[1:3] != (channels, rate) or fmt[5] != 16:
+        return None
+    frames = min(size, os.path.getsize(path) - offset) // (2 * channels)
+    if frames == 0:
+        return np.zeros((0, channels), np.int16)
+    return np.memmap(path, '<i2', 'r', offset, (frames, channels))
+
+def _advise(pcm, advice):
+    mm = getattr(pcm, '_mmap', None)
+    if mm is not None and hasattr(mm, 'madvise'):
+        mm.madvise(advice)
+
+# ───────── AUDIO BANK ──────────────────────────────────────────────
+class Clip:
+    __slots__ = ('name', 'path', 'category', 'pcm', 'rate', 'envelope')
+
+    def __init__(self, name, path, category, pcm, rate, envelope=None):
+        self.name, self.path, self.category, self.pcm, self.rate = name, path, category, pcm, rate
+        self.envelope = envelope            # envelope.Envelope, if analysed
+
+    @property
+    def duration(self):
+        return len(self.pcm) / self.rate
+
+# Index of every clip in the given folders, decoded into memory up front so
+# a celebration never touches the filesystem. Clips are kept per category,
+# so pick() is a single random.choice on a ready-made list. add()/remove()
+# keep it current while running (see clipwatch.py). With an AudioCache,
+# clips come pre-normalised from the cache and only new or changed files
+# are decoded.
+#
+# With mmap=True and a cache, clips are memory-mapped cache entries instead,
+# so a library of hundreds of clips costs almost no RSS. The `resident` most
+# recently picked clips are kept paged in; older ones are handed back to the
+# kernel. Sources are never mapped: the cache only ever replaces an entry
+# whole (os.replace), but a clip rewritten in place under a live mapping
+# would SIGBUS the mixer.
+#
+# With envelopes=True each clip also gets its loudness envelope and onset
+# times (envelope.py), analysed at load and cached alongside the clip.
+class AudioBank:
+    def __init__(self, dirs, rate=RATE, channels=CHANNELS, cache=None, mmap=False, resident=16,
+                 envelopes=False):
+        self.rate, self.channels, self.cache = rate, channels, cache
+        self.mmap, self.resident, self.envelopes = mmap, resident, envelopes
+        self.clips = {}                     # path → Clip
+        self.by_category = {}               # category → [Clip]
+        self.hot = OrderedDict()            # path → Clip, least recently picked first
+        self._all = []
+        self._lock = threading.Lock()
+        for d in dirs:
+            self.load_dir(d)
+        if cache:
+            cache.save()
+
+    def load_dir(self, d):
+        try:
+            names = sorted(f for f in os.listdir(d) if f.lower().endswith(CLIP_EXTENSIONS))
+        except OSError as e:
+            print(f"⚠️ Audio folder unavailable: {e}")
+            return
+        for name in names:
+            self._load(os.path.join(d, name))
+
+    def _read(self, path):
+        if self.mmap and self.cache:
+            pcm = map_wav(self.cache.prepare(path), self.rate, self.channels)
+            if pcm is not None:
+                return pcm
+        return self.cache.load(path) if self.cache else decode(path, self.rate, self.channels)
+
+    def _analyze(self, path, pcm):
+        return self.cache.envelope(path, pcm) if self.cache else analyze(pcm, self.rate)
+
+    def _load(self, path):
+        try:
+            pcm = self._read(path)
+            env = self._analyze(path, pcm) if self.envelopes else None
+        except Exception as e:
+            print(f"⚠️ Could not decode {path}: {e}")
+            return None
+        name = os.path.basename(path)
+        clip = Clip(name, path, categorize(name), pcm, self.rate, env)
+        with self._lock:
+            self.clips[path] = clip
+            self._reindex()
+        return clip
+
+    def _reindex(self):
+        by_category = {}
+        for clip in self.clips.values():
+            by_category.setdefault(clip.category, []).append(clip)
+        self.by_category, self._all = by_category, list(self.clips.values())
+
+    def add(self, path):
+        clip = self._load(path)
+        if clip and self.cache:
+            self.cache.save()
+        return clip
+
+    def remove(self, path):
+        with self._lock:
+            clip = self.clips.pop(path, None)
+            self.hot.pop(path, None)
+            if clip:
+                self._reindex()
+        return clip
+
+    # Move a mapped clip to the front of the LRU and start paging it in;
+    # whatever falls off the end gives its pages back
+    def _touch(self, clip):
+        if not isinstance(clip.pcm, np.memmap):
+            return
+        with self._lock:
+            self.hot[clip.path] = clip
+            self.hot.move_to_end(clip.path)
+            cold = []
+            while len(self.hot) > self.resident:
+                cold.append(self.hot.popitem(last=False)[1])
+        _advise(clip.pcm, mmap.MADV_WILLNEED)
+        for old in cold:
+            _advise(old.pcm, mmap.MADV_DONTNEED)
+
+    def __len__(self):
+        return len(self.clips)
+
+    def pick(self, category=None):
+        pool = self._all if category is None else self.by_category.get(category)
+        if not pool:
+            return None
+        clip = random.choice(pool)
+        self._touch(clip)
+        return clip
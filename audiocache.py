@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Preprocessed-clip cache. Every source clip is decoded, resampled to the
+# output format and loudness-normalised once, then stored as a plain PCM
+# WAV named by the SHA-256 of the source bytes plus the processing
+# settings. Startup only processes files whose content changed; all other
+# clips load straight from the cache with no resampling.
+#
+#   python3 audiocache.py [folder ...]     # pre-build before going live
+import hashlib, json, os, sys, wave
+import numpy as np
+from audio import RATE, CHANNELS, decode
+from envelope import Envelope, analyze
+
+CACHE_VERSION = 1
+DEFAULT_DIR = os.path.expanduser('~/.cache/minigolf-audio')
+
+# ───────── LOUDNESS ────────────────────────────────────────────────
+# RMS-normalise to target_dbfs, but never push the peak above ceiling_dbfs
+def normalize_loudness(pcm, target_dbfs=-16.0, ceiling_dbfs=-1.0):
+    x = pcm.astype(np.float32) / 32768
+    rms = float(np.sqrt(np.mean(np.square(x)))) if x.size else 0.0
+    peak = float(np.abs(x).max()) if x.size else 0.0
+    if rms == 0 or peak == 0:
+        return pcm
+    gain = min(10 ** (target_dbfs / 20) / rms, 10 ** (ceiling_dbfs / 20) / peak)
+    return np.clip(x * gain * 32768, -32768, 32767).astype(np.int16)
+
+# ───────── CACHE ───────────────────────────────────────────────────
+class AudioCache:
+    def __init__(self, cache_dir=DEFAULT_DIR, rate=RATE, channels=CHANNELS, target_dbfs=-16.0):
+        self.dir, self.rate, self.channels, self.target_dbfs = cache_dir, rate, channels, target_dbfs
+        os.makedirs(cache_dir, exist_ok=True)
+        self.settings = f"v{CACHE_VERSION}:{rate}:{channels}:s16:{target_dbfs}".encode()
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        # source path → [size, mtime_ns, key, settings]
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.hits = self.misses = 0
+
+    # Content hash of the source, skipped when size, mtime and settings
+    # all match the index
+    def key(self, path):
+        st = os.stat(path)
+        settings = self.settings.decode()
+        entry = self.index.get(path)
+        if entry and entry[:2] == [st.st_size, st.st_mtime_ns] and entry[3] == settings:
+            return entry[2]
+        h = hashlib.sha256(self.settings)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        key = h.hexdigest()
+        self.index[path] = [st.st_size, st.st_mtime_ns, key, settings]
+        return key
+
+    def cached_path(self, key):
+        return os.path.join(self.dir, key + '.wav')
+
+    # Path of the processed WAV for `path`, processing it on a miss
+    def prepare(self, path):
+        path = os.path.abspath(path)
+        out = self.cached_path(self.key(path))
+        if os.path.exists(out):
+            self.hits += 1
+            return out
+        self.misses += 1
+        pcm = normalize_loudness(decode(path, self.rate, self.channels), self.target_dbfs)
+        tmp = out + '.tmp'
+        with wave.open(tmp, 'wb') as w:
+            w.setnchannels(self.channels)
+            w.setsampwidth(2)
+            w.setframerate(self.rate)
+            w.writeframes(pcm.astype('<i2').tobytes())
+        os.replace(tmp, out)
+        return out
+
+    def load(self, path):
+        with wave.open(self.prepare(path), 'rb') as w:
+            return np.frombuffer(w.readframes(w.getnframes()), '<i2').reshape(-1, self.channels)
+
+    # Loudness envelope + onsets of the processed clip, stored beside it
+    def envelope(self, path, pcm):
+        out = self.cached_path(self.key(os.path.abspath(path)))[:-4] + '.env.npz'
+        try:
+            return Envelope.load(out)
+        except (OSError, ValueError, KeyError):
+            pass
+        env = analyze(pcm, self.rate)
+        env.save(out + '.tmp')
+        os.replace(out + '.tmp', out)
+        return env
+
+    # Persist the index and drop cached clips no source maps to any more
+    def save(self):
+        live = {e[2] for p, e in self.index.items() if os.path.exists(p)}
+        self.index = {p: e for p, e in self.index.items() if e[2] in live and os.path.exists(p)}
+        for name in os.listdir(self.dir):
+            if name.endswith(('.wav', '.env.npz')) and name.split('.')[0] not in live:
+                os.remove(os.path.join(self.dir, name))
+        with open(self.index_path + '.tmp', 'w') as f:
+            json.dump(self.index, f)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+if __name__ == '__main__':
+    from audio import AudioBank
+    dirs = sys.argv[1:] or ['/home/TestPi/golf_sounds']
+    cache = AudioCache()
+    bank = AudioBank(dirs, cache=cache)
+    print(f"✅ {len(bank)} clips ready in {cache.dir}: {cache.hits} cached, {cache.misses} processed")
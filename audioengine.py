@@ -0,0 +1,324 @@
+import fcntl, os, queue, subprocess, threading, time, wave
+from audio import RATE, CHANNELS
+from metrics import Stat
+from mixer import Mixer
+
+F_SETPIPE_SZ = 1031             # Linux fcntl: resize a pipe's kernel buffer
+
+# ───────── SINKS ───────────────────────────────────────────────────
+# A sink takes int16 (frames, channels) blocks. write() blocks at the
+# device's pace (or not at all for an unpaced sink); `latency` is how much
+# audio can sit queued after a write returns.
+
+# One long-lived `aplay` reading raw PCM from a pipe: the device is opened
+# once and every clip after that is just bytes down the pipe.
+class AplaySink:
+    def __init__(self, device='default', rate=RATE, channels=CHANNELS, period=256, periods=4):
+        self.device, self.rate, self.channels = device, rate, channels
+        self.period, self.periods = period, periods
+        self.proc = self.error = None
+        self.open()
+
+    def open(self):
+        try:
+            self.proc = self._spawn()
+        except OSError as e:
+            if str(e) != self.error:        # once, not on every retry
+                print(f"⚠️ Could not start aplay for {self.device}: {e}")
+            self.proc, self.error = None, str(e)
+            return
+        self.error = None
+        # The default 64 KiB pipe would hold ~370 ms of audio ahead of aplay
+        try:
+            fcntl.fcntl(self.proc.stdin.fileno(), F_SETPIPE_SZ, 4096)
+        except OSError:
+            pass
+
+    def _spawn(self):
+        return subprocess.Popen(
+            ['aplay', '-q', '-t', 'raw', '-f', 'S16_LE', '-r', str(self.rate),
+             '-c', str(self.channels), '-D', self.device,
+             f'--period-size={self.period}', f'--buffer-size={self.period * self.periods}', '-'],
+            stdin=subprocess.PIPE, stderr=subprocess.DEVNULL, env=os.environ)
+
+    @property
+    def latency(self):
+        return (self.period * self.periods + 4096 // (2 * self.channels)) / self.rate
+
+    # aplay exits straight away if the device is missing or goes away
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    # Unblock a write stuck on a stalled device (it then raises OSError)
+    def abort(self):
+        if self.proc:
+            self.proc.kill()
+
+    def write(self, block):
+        if self.proc is None:
+            raise BrokenPipeError(f"aplay not running for {self.device}")
+        self.proc.stdin.write(memoryview(block).cast('B'))
+        self.proc.stdin.flush()
+
+    def reopen(self):
+        self.close()
+        self.open()
+
+    def close(self):
+        if self.proc:
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+            self.proc.terminate()
+            self.proc.wait()
+            self.proc = None
+
+# Discards audio. With realtime=True it blocks like a device with a
+# `period * periods` buffer would; with False it runs as fast as it can.
+class NullSink:
+    def __init__(self, rate=RATE, channels=CHANNELS, period=256, periods=4, realtime=True):
+        self.rate, self.channels, self.realtime = rate, channels, realtime
+        self.buffer = period * periods
+        self.frames = 0
+        self.t0 = None
+
+    @property
+    def latency(self):
+        return self.buffer / self.rate if self.realtime else 0.0
+
+    def write(self, block):
+        if self.t0 is None:
+            self.t0 = time.perf_counter()
+        self.frames += len(block)
+        if self.realtime:
+            # sleep until the "device" has room for the next block
+            ahead = (self.frames - self.buffer) / self.rate - (time.perf_counter() - self.t0)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    alive = True
+    def reopen(self): pass
+    def abort(self): pass
+    def close(self): pass
+
+# Writes everything to a WAV file, paced like NullSink.
+class WavFileSink(NullSink):
+    def __init__(self, path, rate=RATE, channels=CHANNELS, period=256, periods=4, realtime=False):
+        super().__init__(rate, channels, period, periods, realtime)
+        self.wav = wave.open(path, 'wb')
+        self.wav.setnchannels(channels)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(rate)
+
+    def write(self, block):
+        self.wav.writeframes(block.astype('<i2').tobytes())
+        super().write(block)
+
+    def close(self):
+        self.wav.close()
+
+# Several outputs in order of preference (e.g. Bluetooth, USB, 3.5 mm,
+# null), all opened up front so a switch never waits on a device open.
+# Blocks go to the best healthy one. A write that raises OSError, or that
+# is still blocked after `stall` s (the watchdog aborts it), marks that
+# output failed and the same block goes straight to the next one. Failed
+# outputs are reopened in the background and taken back once healthy:
+# first after `retry` s, then backing off ×2 per failed attempt up to
+# `max_retry` s, so a card that isn't plugged in doesn't cost an aplay
+# spawn every few seconds all day. reopen() (a device event) retries all
+# of them straight away.
+class FailoverSink:
+    def __init__(self, outputs, stall=0.25, retry=5.0, settle=0.2, max_retry=300.0):
+        self.outputs = outputs              # [(name, sink)], best first
+        self.stall, self.retry, self.settle = stall, retry, settle
+        self.max_retry = max_retry
+        self.failed = set()                 # indices currently out of use
+        self.attempts = 0                   # reopens tried
+        self._delay = [retry] * len(outputs)    # current backoff per output
+        self._due = [0.0] * len(outputs)        # monotonic time of its next reopen
+        self.active = 0
+        self.switches = []                  # (time, from name, to name)
+        self._busy = None                   # monotonic start of the write in progress
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+        self._kick = threading.Event()      # wake the recovery thread early
+        for i, (name, sink) in enumerate(outputs):
+            if not getattr(sink, 'alive', True):
+                self._fail(i, "did not open")
+        self.active = self._best() or 0
+        threading.Thread(target=self._watchdog, daemon=True, name="audio-watchdog").start()
+        threading.Thread(target=self._recover, daemon=True, name="audio-recover").start()
+
+    @property
+    def name(self):
+        return self.outputs[self.active][0]
+
+    @property
+    def latency(self):
+        return self.outputs[self.active][1].latency
+
+    def _best(self):
+        with self._lock:
+            return next((i for i in range(len(self.outputs)) if i not in self.failed), None)
+
+    def write(self, block):
+        while True:
+            best = self._best()
+            if best is None:
+                raise OSError("all audio outputs failed")
+            if best != self.active:
+                self._switch(best)
+            sink = self.outputs[self.active][1]
+            self._busy = time.monotonic()
+            try:
+                sink.write(block)
+                return
+            except OSError as e:
+                self._fail(self.active, e)
+            finally:
+                self._busy = None
+
+    def _switch(self, to):
+        old = self.outputs[self.active][0]
+        self.active = to
+        self.switches.append((time.monotonic(), old, self.outputs[to][0]))
+        print(f"🔀 Audio output: {old} → {self.outputs[to][0]}")
+
+    def _fail(self, i, why):
+        with self._lock:
+            if i in self.failed:
+                return
+            self.failed.add(i)
+            self._delay[i] = self.retry
+            self._due[i] = time.monotonic() + self.retry
+        print(f"⚠️ Audio output {self.outputs[i][0]} failed ({why})")
+
+    def _recover(self):
+        while True:
+            with self._lock:
+                due = min((self._due[i] for i in self.failed), default=None)
+            wait = self.retry if due is None else min(self.retry, max(0.0, due - time.monotonic()))
+            kicked = self._kick.wait(wait)
+            self._kick.clear()
+            if self._halt.is_set():
+                return
+            now = time.monotonic()
+            with self._lock:
+                failed = sorted(i for i in self.failed if kicked or self._due[i] <= now)
+            for i in failed:
+                name, sink = self.outputs[i]
+                self.attempts += 1
+                try:
+                    sink.reopen()
+                except OSError:
+                    pass
+                else:
+                    # give a fresh aplay a moment to fall over if the device is absent
+                    if self._halt.wait(self.settle):
+                        return
+                    if getattr(sink, 'alive', True):
+                        with self._lock:
+                            self.failed.discard(i)
+                        print(f"✅ Audio output {name} back")
+                        continue
+                with self._lock:
+                    self._delay[i] = min(self._delay[i] * 2, self.max_retry)
+                    self._due[i] = time.monotonic() + self._delay[i]
+
+    def _watchdog(self):
+        while not self._halt.wait(self.stall / 4):
+            busy = self._busy
+            if busy is not None and time.monotonic() - busy > self.stall:
+                self.outputs[self.active][1].abort()
+                self._busy = None
+
+    # Take an output out of use now, e.g. its Bluetooth sink just vanished
+    def fail(self, name):
+        for i, (n, sink) in enumerate(self.outputs):
+            if n == name:
+                self._fail(i, "reported lost")
+                if i == self.active:
+                    sink.abort()
+
+    # Try every failed output again straight away (the engine's reopen())
+    def reopen(self):
+        self._kick.set()
+
+    def abort(self):
+        self.outputs[self.active][1].abort()
+
+    def close(self):
+        self._halt.set()
+        self._kick.set()
+        for _, sink in self.outputs:
+            sink.close()
+
+# ───────── ENGINE ──────────────────────────────────────────────────
+# A single thread owns the sink and feeds it one mixed period at a time,
+# all day long (silence when idle, so the device never has to re-open).
+# Other threads talk to it only through the command queue:
+#   play(clip)    – fade out everything else, then start clip
+#   overlay(clip) – start clip on top of whatever is playing
+#   stop()        – fade out all voices
+#   reopen()      – reopen the sink (e.g. the default device changed)
+# `latency` records trigger → first sample audible for every clip started.
+class AudioEngine(threading.Thread):
+    def __init__(self, sink, period=256, channels=CHANNELS, rate=RATE, fade=0.05):
+        super().__init__(daemon=True, name="audio")
+        self.sink, self.period, self.fade = sink, period, fade
+        self.mixer = Mixer(period, channels, rate)
+        self.commands = queue.SimpleQueue()
+        self.latency = Stat("trigger→audio")
+        self.blocks = 0
+
+    # `at` is the time.monotonic() the latency figure is measured from
+    def play(self, clip, gain=1.0, at=None):
+        self.commands.put(('play', clip, gain, time.monotonic() if at is None else at))
+
+    def overlay(self, clip, gain=1.0, at=None):
+        self.commands.put(('overlay', clip, gain, time.monotonic() if at is None else at))
+
+    def stop(self):
+        self.commands.put(('stop', None, None, None))
+
+    def reopen(self):
+        self.commands.put(('reopen', None, None, None))
+
+    def close(self, timeout=1.0):
+        self.commands.put(('quit', None, None, None))
+        if self.is_alive():
+            self.join(timeout)
+        self.sink.close()
+
+    def _drain_commands(self):
+        while True:
+            try:
+                cmd, clip, gain, at = self.commands.get_nowait()
+            except queue.Empty:
+                return True
+            if cmd == 'quit':
+                return False
+            if cmd == 'reopen':
+                self.sink.reopen()
+            if cmd in ('play', 'stop'):
+                self.mixer.stop_all(self.fade)
+            if clip is not None:
+                self.mixer.add(clip.pcm, gain, at=at)
+
+    def run(self):
+        while self._drain_commands():
+            block, started = self.mixer.render()
+            try:
+                self.sink.write(block)
+            except OSError as e:
+                print(f"⚠️ Audio output failed ({e}); reopening")
+                time.sleep(0.5)
+                self.sink.reopen()
+                continue
+            self.blocks += 1
+            # the block just written is heard at most sink.latency from now
+            heard = time.monotonic() + self.sink.latency
+            for at in started:
+                self.latency.add(heard - at)
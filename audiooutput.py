@@ -0,0 +1,117 @@
+import re, subprocess, threading, time
+
+# ───────── SPEAKER BRING-UP ────────────────────────────────────────
+# Event-driven replacement for "restart pulseaudio, sleep, poll `pactl list`
+# ten times": one long-lived `pactl subscribe` reports sinks as they come and
+# go, the speaker is asked to connect once, and the sink counts as ready the
+# moment PulseAudio/PipeWire announces it.
+#
+# `pactl` and `bluetoothctl` are argv prefixes, so a stand-in can replace
+# them (see testing/fakeAudioTools.py).
+EVENT = re.compile(r"Event '(\w+)' on ([\w-]+) #(\d+)")
+
+class AudioOutputManager:
+    def __init__(self, mac=None, sink=None, pactl=('pactl',), bluetoothctl=('bluetoothctl',),
+                 on_ready=None, on_lost=None):
+        self.mac = mac
+        # PulseAudio names it bluez_sink.<MAC>.a2dp_sink, PipeWire bluez_output.<MAC>.1
+        self.match = sink or (mac.replace(':', '_') if mac else None)
+        self.pactl, self.bluetoothctl = list(pactl), list(bluetoothctl)
+        self.on_ready, self.on_lost = on_ready, on_lost
+        self.sinks = {}                     # index → name
+        self.sink = None                    # name of the matched sink, once up
+        self.ready = threading.Event()
+        self.started_at = self.ready_at = None
+        self._connecting = False
+        self._events = None
+        self._lock = threading.Lock()
+
+    def _run(self, argv):
+        return subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, timeout=5).stdout
+
+    def start(self):
+        self.started_at = time.monotonic()
+        # Subscribe first so a sink that appears while we look is not missed
+        self._events = subprocess.Popen(self.pactl + ['subscribe'], stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        threading.Thread(target=self._read_events, daemon=True, name="pactl-events").start()
+        self._refresh()
+        if not self.ready.is_set():
+            self.connect()
+        return self
+
+    def wait(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    @property
+    def startup(self):
+        return self.ready_at - self.started_at if self.ready_at else None
+
+    # One non-blocking connect attempt; readiness comes from the sink event
+    def connect(self):
+        with self._lock:
+            if not self.mac or self._connecting:
+                return
+            self._connecting = True
+        if 'Connected: yes' in self._run(self.bluetoothctl + ['info', self.mac]):
+            return
+        subprocess.Popen(self.bluetoothctl + ['connect', self.mac],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _refresh(self):
+        sinks = {}
+        for line in self._run(self.pactl + ['list', 'short', 'sinks']).splitlines():
+            fields = line.split('\t')
+            if len(fields) > 1 and fields[0].isdigit():
+                sinks[int(fields[0])] = fields[1]
+        with self._lock:
+            self.sinks = sinks
+        self._update()
+
+    # Called from start() and the event thread: the up / lost transition
+    # is claimed under the lock so only one of them acts on it. A lost
+    # speaker is asked to connect again.
+    def _update(self):
+        with self._lock:
+            found = next((n for n in self.sinks.values() if self.match and self.match in n), None)
+            if found and self.sink is None:
+                self.sink, lost = found, None
+            elif not found and self.sink is not None:
+                lost, self.sink = self.sink, None
+                self.ready.clear()
+                self._connecting = False
+            else:
+                return
+        if lost:
+            if self.on_lost:
+                self.on_lost(lost)
+            self.connect()
+            return
+        self._run(self.pactl + ['set-default-sink', found])
+        with self._lock:
+            if self.sink != found:          # gone again meanwhile
+                return
+            self.ready_at = time.monotonic()
+            self.ready.set()
+        if self.on_ready:
+            self.on_ready(found)
+
+    def _read_events(self):
+        for line in self._events.stdout:
+            m = EVENT.match(line)
+            if not m:
+                continue
+            kind, facility, index = m.group(1), m.group(2), int(m.group(3))
+            if facility == 'sink' and kind == 'new':
+                self._refresh()
+            elif facility == 'sink' and kind == 'remove':
+                with self._lock:
+                    self.sinks.pop(index, None)
+                self._update()
+
+    def close(self):
+        if self._events:
+            self._events.terminate()
+            self._events.wait()
+            self._events = None
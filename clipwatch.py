@@ -0,0 +1,106 @@
+import ctypes, ctypes.util, os, select, struct, threading
+from audio import CLIP_EXTENSIONS
+
+# ───────── FOLDER WATCHERS ─────────────────────────────────────────
+# Both watchers call on_added(path) for a new or rewritten clip file and
+# on_removed(path) when one goes away, from their own background thread.
+def _is_clip(name):
+    return name.lower().endswith(CLIP_EXTENSIONS)
+
+# Linux inotify through libc, so no extra package is needed
+IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x008, 0x040, 0x080
+IN_DELETE, IN_DELETE_SELF, IN_ISDIR = 0x200, 0x400, 0x40000000
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+EVENT = struct.Struct('iIII')
+
+class InotifyWatcher(threading.Thread):
+    def __init__(self, dirs, on_added, on_removed):
+        super().__init__(daemon=True, name="clipwatch")
+        self.on_added, self.on_removed = on_added, on_removed
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+        for d in dirs:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(d), mask)
+            if wd >= 0:
+                self.dirs[wd] = d
+        if not self.dirs:
+            os.close(self.fd)
+            raise OSError("no watchable folders")
+        self._wake_r, self._wake_w = os.pipe()
+
+    def run(self):
+        while True:
+            ready, _, _ = select.select([self.fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                break
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, pos)
+                name = data[pos + EVENT.size:pos + EVENT.size + length].rstrip(b'\0').decode(errors='replace')
+                pos += EVENT.size + length
+                if mask & IN_ISDIR or not _is_clip(name) or wd not in self.dirs:
+                    continue
+                path = os.path.join(self.dirs[wd], name)
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    self.on_added(path)
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    self.on_removed(path)
+        os.close(self.fd)
+
+    def stop(self, timeout=1.0):
+        os.write(self._wake_w, b'x')
+        if self.is_alive():
+            self.join(timeout)
+
+# Fallback: rescan every `interval` seconds and diff (size, mtime)
+class PollingWatcher(threading.Thread):
+    def __init__(self, dirs, on_added, on_removed, interval=5.0):
+        super().__init__(daemon=True, name="clipwatch")
+        self.dirs, self.on_added, self.on_removed = dirs, on_added, on_removed
+        self.interval = interval
+        self._halt = threading.Event()
+        self.seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        for d in self.dirs:
+            try:
+                with os.scandir(d) as entries:
+                    for e in entries:
+                        if _is_clip(e.name) and e.is_file():
+                            st = e.stat()
+                            seen[e.path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+        return seen
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            now = self._scan()
+            for path, sig in now.items():
+                if self.seen.get(path) != sig:
+                    self.on_added(path)
+            for path in self.seen.keys() - now.keys():
+                self.on_removed(path)
+            self.seen = now
+
+    def stop(self, timeout=1.0):
+        self._halt.set()
+        if self.is_alive():
+            self.join(timeout)
+
+def watch(dirs, on_added, on_removed, interval=5.0):
+    try:
+        watcher = InotifyWatcher(dirs, on_added, on_removed)
+    except (OSError, AttributeError):
+        watcher = PollingWatcher(dirs, on_added, on_removed, interval)
+    watcher.start()
+    return watcher
@@ -0,0 +1,170 @@
+from bisect import insort, bisect_left
+from collections import deque
+import numpy as np
+
+# HC-SR04 readings outside this window are junk (no echo, ringing, etc.)
+VALID_MIN, VALID_MAX = 1, 400
+
+def valid(dist):
+    return dist is not None and VALID_MIN < dist < VALID_MAX
+
+# ───────── STREAMING FILTERS ───────────────────────────────────────
+# Each takes one reading per update() and returns the filtered value.
+class Passthrough:
+    def update(self, x): return x
+    def reset(self): pass
+
+class RollingMedian:
+    def __init__(self, n=3):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self.window, self.ordered = deque(), []
+
+    def update(self, x):
+        self.window.append(x)
+        insort(self.ordered, x)
+        if len(self.window) > self.n:
+            del self.ordered[bisect_left(self.ordered, self.window.popleft())]
+        k = len(self.ordered)
+        mid = k // 2
+        return self.ordered[mid] if k % 2 else (self.ordered[mid - 1] + self.ordered[mid]) / 2
+
+class Ema:
+    def __init__(self, alpha=0.6):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.y = None
+
+    def update(self, x):
+        self.y = x if self.y is None else self.y + self.alpha * (x - self.y)
+        return self.y
+
+# ───────── DECISIONS ───────────────────────────────────────────────
+# Streak is level-triggered (True on every sample once n in a row are
+# under threshold), like the old hit_streak check. Hysteresis fires once
+# when the ball arrives and re-arms only after readings go above exit_cm.
+class Streak:
+    def __init__(self, detect_cm, n):
+        self.detect_cm, self.n = detect_cm, n
+        self.reset()
+
+    def reset(self):
+        self.run = 0
+
+    def update(self, y):
+        self.run = self.run + 1 if y < self.detect_cm else 0
+        return self.run >= self.n
+
+class Hysteresis:
+    def __init__(self, enter_cm, exit_cm, n=1):
+        self.enter_cm, self.exit_cm, self.n = enter_cm, max(exit_cm, enter_cm), n
+        self.reset()
+
+    def reset(self):
+        self.run, self.inside = 0, False
+
+    def update(self, y):
+        self.run = self.run + 1 if y < self.enter_cm else 0
+        if not self.inside and self.run >= self.n:
+            self.inside = True
+            return True
+        if self.inside and y > self.exit_cm:
+            self.inside = False
+        return False
+
+# ───────── DETECTOR ────────────────────────────────────────────────
+# gate='reset': an invalid reading counts as "nothing there" (VALID_MAX).
+# gate='skip':  invalid readings are dropped before the filter, so a
+#               dropout in the middle of a sink no longer breaks it.
+class Detector:
+    def __init__(self, filt, decide, gate='skip'):
+        self.filt, self.decide, self.gate = filt, decide, gate
+
+    def reset(self):
+        self.filt.reset()
+        self.decide.reset()
+
+    def update(self, dist):
+        if not valid(dist):
+            if self.gate == 'skip':
+                return False
+            dist = VALID_MAX
+        return self.decide.update(self.filt.update(dist))
+
+DETECTORS = ('streak', 'median', 'ema', 'hysteresis')
+
+def make_detector(kind, detect_cm=5, hits=2, hyst_cm=3, median_n=3, alpha=0.6):
+    if kind == 'streak':
+        return Detector(Passthrough(), Streak(detect_cm, hits), gate='reset')
+    if kind == 'median':
+        return Detector(RollingMedian(median_n), Hysteresis(detect_cm, detect_cm + hyst_cm))
+    if kind == 'ema':
+        return Detector(Ema(alpha), Hysteresis(detect_cm, detect_cm + hyst_cm))
+    if kind == 'hysteresis':
+        return Detector(Passthrough(), Hysteresis(detect_cm, detect_cm + hyst_cm, hits))
+    raise ValueError(f"Unknown detector: {kind!r}")
+
+# ───────── OFFLINE (VECTORIZED) ────────────────────────────────────
+# Same pipelines as above, run over a whole recorded trace at once.
+# `dists` is a float array with NaN for missing readings; the result is
+# a bool array of what Detector.update() would have returned per sample.
+def _run_lengths(mask):
+    idx = np.arange(len(mask))
+    last_false = np.maximum.accumulate(np.where(mask, -1, idx))
+    return idx - last_false
+
+def _median(x, n):
+    pad = np.concatenate([np.full(n - 1, np.nan), x])
+    return np.nanmedian(np.lib.stride_tricks.sliding_window_view(pad, n), axis=1)
+
+def _ema(x, alpha, block=256):
+    if alpha >= 1 or len(x) == 0:
+        return x.copy()
+    # Closed form per block: y_k = d^(k+1)·y_prev + α·d^k·Σ_{j≤k} d^-j·x_j,
+    # with the block short enough that d^-block stays well inside float range
+    d = 1.0 - alpha
+    block = max(1, min(block, int(200 / -np.log10(d))))
+    out = np.empty_like(x)
+    y_prev = x[0]
+    for s in range(0, len(x), block):
+        xb = x[s:s + block]
+        k = np.arange(len(xb))
+        dk = d ** k
+        out[s:s + block] = d * dk * y_prev + alpha * dk * np.cumsum(xb / dk)
+        y_prev = out[s + len(xb) - 1]
+    return out
+
+def _hysteresis(y, enter_cm, exit_cm, n):
+    exit_cm = max(exit_cm, enter_cm)
+    arm = _run_lengths(y < enter_cm) >= n
+    event = np.where(arm, 1, np.where(y > exit_cm, 0, -1))
+    idx = np.maximum.accumulate(np.where(event >= 0, np.arange(len(y)), 0))
+    inside = event[idx] == 1
+    return inside & ~np.concatenate([[False], inside[:-1]])
+
+def run_trace(dists, kind, detect_cm=5, hits=2, hyst_cm=3, median_n=3, alpha=0.6):
+    dists = np.asarray(dists, dtype=float)
+    ok = (dists > VALID_MIN) & (dists < VALID_MAX)
+    out = np.zeros(len(dists), dtype=bool)
+
+    if kind == 'streak':
+        x = np.where(ok, dists, VALID_MAX)
+        return _run_lengths(x < detect_cm) >= hits
+
+    x = dists[ok]
+    if len(x) == 0:
+        return out
+    if kind == 'median':
+        fired = _hysteresis(_median(x, median_n), detect_cm, detect_cm + hyst_cm, 1)
+    elif kind == 'ema':
+        fired = _hysteresis(_ema(x, alpha), detect_cm, detect_cm + hyst_cm, 1)
+    elif kind == 'hysteresis':
+        fired = _hysteresis(x, detect_cm, detect_cm + hyst_cm, hits)
+    else:
+        raise ValueError(f"Unknown detector: {kind!r}")
+    out[ok] = fired
+    return out
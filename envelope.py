@@ -0,0 +1,131 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ───────── ANALYSIS ────────────────────────────────────────────────
+# Done once per clip when it is loaded (and cached by AudioCache), never
+# at trigger time. Everything here is whole-array NumPy; the only Python
+# loop is over the handful of onset candidates.
+FPS = 50                    # envelope frames per second
+FFT_SIZE = 1024
+FLOOR_DB = 30               # levels this far below the clip's loudest frame read as 0
+
+class Envelope:
+    __slots__ = ('fps', 'level', 'onsets', 'tempo')
+
+    def __init__(self, fps, level, onsets, tempo=0.0):
+        self.fps = fps
+        self.level = level          # uint8 loudness per frame, 0–255
+        self.onsets = onsets        # float32 seconds from clip start
+        self.tempo = tempo          # estimated BPM, 0 if no clear beat
+
+    @property
+    def duration(self):
+        return len(self.level) / self.fps
+
+    def level_at(self, t):
+        i = int(t * self.fps)
+        return int(self.level[i]) if 0 <= i < len(self.level) else 0
+
+    # Onset times in [t0, t1)
+    def onsets_between(self, t0, t1):
+        a, b = np.searchsorted(self.onsets, (t0, t1))
+        return self.onsets[a:b]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, fps=self.fps, level=self.level, onsets=self.onsets, tempo=self.tempo)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(int(z['fps']), z['level'], z['onsets'], float(z['tempo']))
+
+def _frames(mono, hop, size):
+    pad = np.concatenate([mono, np.zeros(size, mono.dtype)])
+    return sliding_window_view(pad, size)[:len(mono) // hop * hop:hop]
+
+# Loudness: RMS per frame in dB, scaled so the loudest frame is 255
+def _level(mono, hop):
+    n = len(mono) // hop
+    rms = np.sqrt(np.mean(np.square(mono[:n * hop].reshape(n, hop)), axis=1))
+    db = 20 * np.log10(rms + 1e-9)
+    return np.clip((db - db.max() + FLOOR_DB) / FLOOR_DB * 255, 0, 255).astype(np.uint8)
+
+# Spectral flux: summed rise in log-magnitude per FFT bin, frame to frame
+def _flux(mono, hop):
+    frames = _frames(mono, hop, FFT_SIZE) * np.hanning(FFT_SIZE).astype(np.float32)
+    mag = np.log1p(10 * np.abs(np.fft.rfft(frames, axis=1)))
+    flux = np.zeros(len(mag), np.float32)
+    flux[1:] = np.maximum(0, np.diff(mag, axis=0)).sum(axis=1)
+    return flux
+
+# Local maxima above a moving-average threshold, at least `gap` s apart
+def _onsets(flux, fps, gap=0.1, k=1.5):
+    if len(flux) < 3 or not flux.any():
+        return np.zeros(0, np.float32)
+    w = max(1, fps // 4) * 2 + 1
+    thr = k * np.convolve(flux, np.ones(w) / w, 'same') + 0.05 * flux.max()
+    peak = (flux[1:-1] > flux[:-2]) & (flux[1:-1] >= flux[2:]) & (flux[1:-1] > thr[1:-1])
+    cand = np.flatnonzero(peak) + 1
+    keep, last = [], -gap * fps
+    for i in cand:
+        if i - last >= gap * fps:
+            keep.append(i)
+            last = i
+    return np.asarray(keep, np.float32) / fps
+
+# Tempo from the strongest autocorrelation lag of the flux, 60–200 BPM
+def _tempo(flux, fps, min_corr=0.3):
+    f = flux - flux.mean()
+    lo, hi = int(fps * 60 / 200), int(fps * 60 / 60)
+    if len(f) < 2 * hi or not f.any():
+        return 0.0
+    ac = np.fft.irfft(np.abs(np.fft.rfft(f, 2 * len(f))) ** 2)[:hi + 1]
+    lag = lo + int(np.argmax(ac[lo:hi + 1]))
+    return 60.0 * fps / lag if ac[lag] >= min_corr * ac[0] else 0.0
+
+def analyze(pcm, rate, fps=FPS):
+    hop = rate // fps
+    mono = pcm.astype(np.float32).mean(axis=1) / 32768 if pcm.ndim == 2 else pcm / 32768
+    if len(mono) < hop:
+        return Envelope(fps, np.zeros(0, np.uint8), np.zeros(0, np.float32))
+    flux = _flux(mono, hop)
+    return Envelope(fps, _level(mono, hop), _onsets(flux, fps), _tempo(flux, fps))
+
+# ───────── LIGHT FOLLOWER ──────────────────────────────────────────
+# Drives the lights from a clip's envelope on a scheduler's timers
+# (LoopTimers or VirtualClock): every tick it looks up the
+# current level and any onsets since the last tick, and calls
+# level(0–255) when the level moved by `step` or more, and flash() per onset.
+class EnvelopeFollower:
+    def __init__(self, timers, level, flash, fps=25, step=12):
+        self.timers, self.level, self.flash = timers, level, flash
+        self.period, self.step = 1.0 / fps, step
+        self._task = None
+
+    # `delay`: how long until the clip is actually heard (output latency)
+    def start(self, envelope, delay=0.0):
+        self.stop()
+        self.env = envelope
+        self.t0 = self.timers.time() + delay
+        self._last_t, self._sent = 0.0, -255
+        self._tick()
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _tick(self):
+        t = self.timers.time() - self.t0
+        for _ in self.env.onsets_between(self._last_t, t + 1e-6):
+            self.flash()
+        self._last_t = t + 1e-6
+        lvl = self.env.level_at(t)
+        if abs(lvl - self._sent) >= self.step or (lvl == 0 and self._sent):
+            self.level(lvl)
+            self._sent = lvl
+        if t < self.env.duration:
+            self._task = self.timers.call_at(self.timers.time() + self.period, self._tick)
+        else:
+            self._task = None
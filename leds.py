@@ -0,0 +1,416 @@
+import queue, threading, time
+import numpy as np
+import picoproto as proto
+from metrics import Stat
+
+# ───────── FRAME BUFFER ────────────────────────────────────────────
+# A frame is an (N, 3) uint8 RGB array. Effects paint whole frames with
+# array operations and are pure functions of elapsed time t (seconds):
+# anything random is seeded from t, so the same t always gives the same
+# frame. An output then sends the finished frame in one bulk write.
+def new_frame(n):
+    return np.zeros((n, 3), np.uint8)
+
+def _rng(*seed):
+    return np.random.default_rng(seed)
+
+# ───────── EFFECTS ─────────────────────────────────────────────────
+class Fill:
+    def __init__(self, color=(0, 0, 0)):
+        self.color = np.array(color, np.uint8)
+
+    def __call__(self, frame, t):
+        frame[:] = self.color
+
+# Random green "grass" shimmer, re-rolled `rate` times a second
+class Fairway:
+    def __init__(self, low=60, high=180, rate=10, seed=0):
+        self.low, self.high, self.rate, self.seed = low, high, rate, seed
+
+    def __call__(self, frame, t):
+        frame[:, 0] = frame[:, 2] = 0
+        frame[:, 1] = _rng(self.seed, int(t * self.rate)).integers(self.low, self.high + 1, len(frame))
+
+# One lit pixel bouncing end to end and back in `seconds`
+class PulsePutt:
+    def __init__(self, color=(255, 255, 0), seconds=2.0):
+        self.color, self.seconds = np.array(color, np.uint8), seconds
+
+    def __call__(self, frame, t):
+        n = len(frame)
+        step = int((t % self.seconds) / self.seconds * 2 * n)
+        frame[:] = 0
+        frame[step if step < n else 2 * n - 1 - step] = self.color
+
+# Fills from the start, then empties from the far end, in `seconds`
+class YellowWave:
+    def __init__(self, color=(255, 255, 0), seconds=1.0):
+        self.color, self.seconds = np.array(color, np.uint8), seconds
+
+    def __call__(self, frame, t):
+        n = len(frame)
+        step = int((t % self.seconds) / self.seconds * 2 * n)
+        lit = step if step < n else 2 * n - step
+        frame[:lit] = self.color
+        frame[lit:] = 0
+
+# Random white flashes on black, a new set every flash_ms
+class Paparazzi:
+    def __init__(self, density=0.25, flash_ms=60, color=(255, 255, 255), seed=0):
+        self.density, self.flash_ms, self.seed = density, flash_ms, seed
+        self.color = np.array(color, np.uint8)
+
+    def __call__(self, frame, t):
+        n = len(frame)
+        frame[:] = 0
+        hits = _rng(self.seed, int(t * 1000 // self.flash_ms)).integers(0, n, max(1, int(n * self.density)))
+        frame[hits] = self.color
+
+# Plays effects back to back: Sequence((2, PulsePutt()), (None, Paparazzi()))
+# – each gets its own local t; a None length runs to the end of the show
+class Sequence:
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def __call__(self, frame, t):
+        for seconds, effect in self.parts:
+            if seconds is None or t < seconds:
+                return effect(frame, t)
+            t -= seconds
+        frame[:] = 0
+
+# ───────── FRAME CLOCK ─────────────────────────────────────────────
+# Calls render(t) once per 1/fps tick, t being the tick's scheduled time
+# since the start, so an effect's timing never depends on how long a
+# frame takes. Ticks are absolute (no sleep-after-work drift); when a
+# frame runs over, the missed ticks are skipped rather than rushed, and
+# run() returns exactly `duration` s after it started.
+class FrameClock:
+    def __init__(self, fps=60, clock=time.monotonic, sleep=time.sleep):
+        self.fps, self.period = fps, 1.0 / fps
+        self.clock, self.sleep = clock, sleep
+        self.frame_time = Stat("frame time")
+        self.frames = self.skipped = self.overruns = 0
+        self.busy = 0.0                     # seconds spent in finished run()s
+        self._since = None                  # start of the run() in progress
+
+    def _wait(self, delay, stop):
+        if delay > 0:
+            if stop is None:
+                self.sleep(delay)
+            else:
+                stop.wait(delay)
+
+    # Runs until `duration` s have passed (None = forever) or `stop` is set
+    def run(self, render, duration=None, stop=None):
+        t0 = self._since = self.clock()
+        k = 0
+        while not (stop and stop.is_set()):
+            t = k * self.period
+            if duration is not None and t >= duration:
+                break
+            start = self.clock()
+            render(t)
+            took = self.clock() - start
+            self.frames += 1
+            self.frame_time.add(took)
+            if took > self.period:
+                self.overruns += 1
+            # next tick still ahead of us; skip any that have already passed
+            k += 1
+            due = int((self.clock() - t0) / self.period) + 1
+            if due > k:
+                self.skipped += due - k
+                k = due
+            self._wait(t0 + k * self.period - self.clock(), stop)
+        if duration is not None:
+            self._wait(t0 + duration - self.clock(), stop)
+        self.busy += self.clock() - t0
+        self._since = None
+
+    @property
+    def achieved(self):
+        since = self._since
+        busy = self.busy + (self.clock() - since if since is not None else 0.0)
+        return self.frames / busy if busy else 0.0
+
+    def __str__(self):
+        return (f"{self.achieved:.1f}/{self.fps} FPS, {self.skipped} skipped, "
+                f"{self.overruns} overruns | {self.frame_time}")
+
+# ───────── OUTPUTS ─────────────────────────────────────────────────
+# write(frame) sends one whole frame. Brightness and colour order are
+# applied there with lookup tables, so effects always work in full-scale RGB.
+# write_raw(grb) takes bytes already in strip order (a pre-rendered
+# animation frame, see animation.py) and skips the reorder.
+# Every output remembers the last frame it sent: a frame that changes
+# nothing is skipped (the LEDs hold their colour), and show(grb, prev)
+# gets the previous frame so a link that can patch the strip sends only
+# what changed. shows / skipped / sent (bytes) count what went out. A
+# frame that fails to go out is counted in errors and the next one is
+# sent whole (logged once per outage, not per frame).
+def brightness_lut(brightness):
+    return np.round(np.arange(256) * brightness).astype(np.uint8)
+
+GRB = (1, 0, 2)
+
+# Runs of LEDs that differ between two frames as [(first, end)], runs at
+# most `gap` LEDs apart merged; prev None means everything changed
+def changed_spans(prev, cur, gap=1):
+    if prev is None:
+        return [(0, len(cur))]
+    changed = np.any(prev != cur, axis=1)
+    if not changed.any():
+        return []
+    edges = np.diff(np.concatenate(([0], changed.view(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    keep = starts[1:] - ends[:-1] > gap
+    starts = starts[np.concatenate(([True], keep))]
+    ends = ends[np.concatenate((keep, [True]))]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+# Runs of identical pixels in an (N, 3) span as (starts, counts)
+def pixel_runs(grb):
+    new = np.any(grb[1:] != grb[:-1], axis=1)
+    starts = np.flatnonzero(np.concatenate(([True], new)))
+    return starts, np.diff(np.append(starts, len(grb)))
+
+class Strip:
+    def __init__(self, n, brightness=0.6, order=GRB, dedupe=True):
+        self.n, self.order, self.dedupe = n, list(order), dedupe
+        self.lut = brightness_lut(brightness)
+        self.last = None                    # (N, 3) GRB as last shown
+        self.shows = self.skipped = self.sent = self.errors = 0
+        self.failing = False
+        self._mark = (time.monotonic(), 0, 0, 0)
+
+    def write(self, frame):
+        self._send(self.lut[frame[:, self.order]])
+
+    def write_raw(self, grb):
+        self._send(self.lut[np.frombuffer(grb, np.uint8).reshape(-1, 3)])
+
+    def _send(self, grb):
+        if self.dedupe and self.last is not None and np.array_equal(grb, self.last):
+            self.skipped += 1
+            return
+        try:
+            self.sent += self.show(grb, self.last)
+        except Exception as e:
+            self.errors += 1
+            self.last = None
+            if not self.failing:
+                self.failing = True
+                print(f"⚠️ LED output failed ({e}); retrying")
+            return
+        if self.failing:
+            self.failing = False
+            print("✅ LED output back")
+        self.shows += 1
+        self.last = grb
+
+    # Sends one frame, returns the bytes it took
+    def show(self, grb, prev):
+        raise NotImplementedError
+
+    def close(self):
+        self.write(new_frame(self.n))
+
+    # Rates since the last call, which starts the next window (one stats
+    # line to the next)
+    def rates(self):
+        now = time.monotonic()
+        then, shows, skipped, sent = self._mark
+        self._mark = (now, self.shows, self.skipped, self.sent)
+        dt = max(now - then, 1e-9)
+        return (f"{(self.shows - shows) / dt:.1f} shows/s, {(self.skipped - skipped) / dt:.1f} skipped/s, "
+                f"{(self.sent - sent) / dt / 1024:.1f} KiB/s, {self.errors} errors")
+
+    def __str__(self):
+        return (f"{self.shows} shows, {self.skipped} skipped, {self.sent / 1024:.1f} KiB, "
+                f"{self.errors} errors")
+
+# WS2812 over SPI (MOSI, GPIO 10): every data bit becomes 3 SPI bits at
+# 2.4 MHz (0 → 100, 1 → 110), so each colour byte is 3 SPI bytes. The
+# byte → 3-byte table turns a whole frame into the SPI stream with one
+# fancy index, then it goes out in a single writebytes2() call. The chain
+# can only be rewritten end to end, so a changed frame is always sent whole.
+SPI_HZ = 2_400_000
+RESET_BYTES = 90                # ≥ 280 µs low latches the frame (WS2812B)
+
+def _spi_table():
+    bits = (np.arange(256)[:, None] >> np.arange(7, -1, -1)) & 1          # (256, 8) MSB first
+    pattern = 0b100 | (bits << 1)                                         # 3 SPI bits per bit
+    word = (pattern << (3 * np.arange(7, -1, -1))).sum(axis=1)            # 24 bits per byte
+    return ((word[:, None] >> np.array([16, 8, 0])) & 0xFF).astype(np.uint8)
+
+class SpiStrip(Strip):
+    def __init__(self, n, brightness=0.6, bus=0, device=0, order=GRB, dedupe=True):
+        import spidev
+        super().__init__(n, brightness, order, dedupe)
+        self.spi = spidev.SpiDev()
+        self.spi.open(bus, device)
+        self.spi.max_speed_hz = SPI_HZ
+        self.spi.mode = 0
+        self.table = _spi_table()
+        self.out = np.zeros(n * 9 + RESET_BYTES, np.uint8)    # trailing zeros = reset
+
+    def encode(self, grb):
+        self.out[:self.n * 9] = self.table[grb].reshape(-1)
+        return self.out
+
+    def show(self, grb, prev):
+        self.spi.writebytes2(self.encode(grb))
+        return len(self.out)
+
+    def close(self):
+        super().close()
+        self.spi.close()
+
+# Same encoding as SpiStrip, but the stream goes nowhere (benchmarks, sim)
+class NullStrip(SpiStrip):
+    def __init__(self, n, brightness=0.6, order=GRB, dedupe=True):
+        Strip.__init__(self, n, brightness, order, dedupe)
+        self.table = _spi_table()
+        self.out = np.zeros(n * 9 + RESET_BYTES, np.uint8)
+
+    def show(self, grb, prev):
+        self.encode(grb)
+        return len(self.out)
+
+    def close(self):
+        pass
+
+# A strip on the Pico, fed over its USB serial link (main.py stream
+# mode): each frame goes as picoproto SPAN / RUNS packets for the
+# changed runs only, then SHOW. `send(type, payload)` sends one packet
+# (PicoLink.send), `request(type, payload)` one that must be acknowledged
+# (PicoLink.request; without it packets are just sent). Stream mode is
+# requested before the first frame, and about once a second SHOW goes as
+# a request too: a Pico that lost stream mode (rebooted, or the PLAY got
+# lost) NAKs it, and the strip asks for stream mode again and resends
+# the whole frame.
+CHECK_SEC = 1.0
+
+class PicoStrip(Strip):
+    def __init__(self, n, send, brightness=0.6, order=GRB, dedupe=True, rle=True, request=None):
+        super().__init__(n, brightness, order, dedupe)
+        self.send, self.rle = send, rle
+        self.request = request or (lambda type_, payload=b'': send(type_, payload) or True)
+        self.streaming = False
+        self._check_at = 0.0
+
+    def _start(self):
+        if not self.request(proto.PLAY, proto.play(proto.STREAM)):
+            raise IOError("Pico did not start stream mode")
+        self.streaming = True
+        self._check_at = time.monotonic() + CHECK_SEC
+
+    # Each changed span goes as raw GRB (3 bytes a LED) or, when it is
+    # mostly solid colour, as runs (4 bytes a run of up to 255 LEDs)
+    def show(self, grb, prev):
+        try:
+            return self._show(grb, prev)
+        except Exception:
+            self.streaming = False          # start over: PLAY stream + a whole frame
+            raise
+
+    def _show(self, grb, prev):
+        if not self.streaming:
+            self._start()
+            prev = None
+        sent = 0
+        for first, end in changed_spans(prev, grb, gap=3):     # a packet costs 9 bytes = 3 LEDs
+            span = grb[first:end]
+            starts, counts = pixel_runs(span)
+            if self.rle and 4 * len(starts) < 3 * len(span):
+                sent += self._send_runs(first, span, starts, counts)
+            else:
+                sent += self._send_span(first, span)
+        if time.monotonic() < self._check_at:
+            self.send(proto.SHOW)
+        elif self.request(proto.SHOW):
+            self._check_at = time.monotonic() + CHECK_SEC
+        else:
+            raise IOError("Pico is not streaming")
+        return sent + proto.OVERHEAD
+
+    def _send_span(self, first, span):
+        sent = 0
+        for a in range(0, len(span), proto.SPAN_LEDS):
+            payload = proto.span(first + a, span[a:a + proto.SPAN_LEDS].tobytes())
+            self.send(proto.SPAN, payload)
+            sent += proto.OVERHEAD + len(payload)
+        return sent
+
+    def _send_runs(self, first, span, starts, counts):
+        runs = []                           # (count, 4 bytes), ≤ 255 LEDs each
+        for start, count in zip(starts.tolist(), counts.tolist()):
+            px = span[start].tobytes()
+            while count:
+                k = min(count, 255)
+                runs.append((k, bytes((k,)) + px))
+                count -= k
+        sent = 0
+        for a in range(0, len(runs), proto.MAX_RUNS):
+            chunk = runs[a:a + proto.MAX_RUNS]
+            payload = proto.span(first, b''.join(run for _, run in chunk))
+            self.send(proto.RUNS, payload)
+            sent += proto.OVERHEAD + len(payload)
+            first += sum(k for k, _ in chunk)
+        return sent
+
+# ───────── LIGHT SHOW ──────────────────────────────────────────────
+# One thread owns the strip and plays effects on a FrameClock; other
+# threads just queue requests. Between shows it loops the idle effect.
+class LightShow(threading.Thread):
+    def __init__(self, strip, n, fps=60, idle=None):
+        super().__init__(daemon=True, name="lights")
+        self.strip, self.frame = strip, new_frame(n)
+        self.clock = FrameClock(fps)
+        self.idle_effect = idle or Fill()
+        self.requests = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._halt = False
+
+    def _request(self, effect, seconds):
+        self.requests.put((effect, seconds))
+        self._wake.set()
+
+    def play(self, effect, seconds):
+        self._request(effect, seconds)
+
+    def idle(self, effect=None):
+        if effect is not None:
+            self.idle_effect = effect
+        self._request(None, None)
+
+    def off(self):
+        self.idle(Fill())
+
+    def _render(self, effect):
+        if getattr(effect, 'raw', False):
+            return lambda t: self.strip.write_raw(effect.grb(t))
+        def render(t):
+            effect(self.frame, t)
+            self.strip.write(self.frame)
+        return render
+
+    def run(self):
+        effect, seconds = None, None
+        while not self._halt:
+            self.clock.run(self._render(effect or self.idle_effect), seconds, self._wake)
+            effect, seconds = None, None            # show over: back to idle
+            self._wake.clear()                      # before draining: a later request wakes the next run
+            while True:                             # latest request wins
+                try:
+                    effect, seconds = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+
+    def close(self, timeout=1.0):
+        self._halt = True
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.strip.close()
@@ -1,87 +1,515 @@
-import machine, neopixel, utime, urandom, sys, select
+import machine, neopixel, utime, urandom, sys, select, struct, micropython, array, gc, _thread
+import picoproto as proto   # copy picoproto.py to the Pico too
 
 # ───────── CONFIG ──────────────────────────────────────────────
 NUM_LEDS = 100
 PIN_NUM = 0               # GPIO 0 (pin 1 on Pico)
 BRIGHTNESS = 0.6
+GAMMA = 1.0               # 2.2 gives perceptually even fades
+DUAL_CORE = True          # core 1 renders + drives the strip, core 0 reads serial
 np = neopixel.NeoPixel(machine.Pin(PIN_NUM), NUM_LEDS)
+buf = np.buf              # GRB bytes, written directly below
 
 # ───────── HELPERS ─────────────────────────────────────────────
-def apply_brightness(color):
-    return tuple(int(c * BRIGHTNESS) for c in color)
+# Nothing here allocates per frame: brightness and gamma are one
+# bytearray lookup, colours are packed 0xGGRRBB ints made once, and the
+# per-pixel loops are viper code writing straight into np.buf with a
+# xorshift RNG (ctx = [rng state, LED count, colour]).
+LUT = bytearray(256)
+ctx = array.array('I', [urandom.getrandbits(32) | 1, NUM_LEDS, 0])
+lit = array.array('H', bytearray(2 * NUM_LEDS))   # pixels of the last flash
 
-def fill(color):
-    color = apply_brightness(color)
-    for i in range(NUM_LEDS):
-        np[i] = color
-    np.write()
+def rgb(r, g, b):
+    return LUT[g] << 16 | LUT[r] << 8 | LUT[b]
 
-def off():
-    fill((0, 0, 0))
+BLACK = 0
+
+# Rebuilds the LUT and the colours made from it (only on a command)
+def set_brightness(level):
+    global BRIGHTNESS, WHITE, YELLOW
+    BRIGHTNESS = level
+    for i in range(256):
+        LUT[i] = int(((i / 255) ** GAMMA) * 255 * level + 0.5)
+    WHITE = rgb(255, 255, 255)
+    YELLOW = rgb(255, 255, 0)
+
+set_brightness(BRIGHTNESS)
+
+@micropython.viper
+def fill_buf(buf: ptr8, n: int, color: int):
+    g = (color >> 16) & 0xFF
+    r = (color >> 8) & 0xFF
+    b = color & 0xFF
+    i = 0
+    while i < n * 3:
+        buf[i] = g
+        buf[i + 1] = r
+        buf[i + 2] = b
+        i += 3
+
+@micropython.viper
+def put_px(buf: ptr8, i: int, color: int):
+    buf[i * 3] = (color >> 16) & 0xFF
+    buf[i * 3 + 1] = (color >> 8) & 0xFF
+    buf[i * 3 + 2] = color & 0xFF
+
+# Random green 60–180 on every LED
+@micropython.viper
+def shimmer_buf(buf: ptr8, lut: ptr8, ctx: ptr32):
+    x = uint(ctx[0])
+    n = int(ctx[1])
+    i = 0
+    while i < n:
+        x ^= x << 13
+        x ^= x >> 17
+        x ^= x << 5
+        buf[i * 3] = lut[60 + ((int(x & 0xFF) * 121) >> 8)]
+        buf[i * 3 + 1] = 0
+        buf[i * 3 + 2] = 0
+        i += 1
+    ctx[0] = int(x)
+
+# Light `count` random LEDs in ctx's colour, remembering them in `lit`
+@micropython.viper
+def sparkle_buf(buf: ptr8, lit: ptr16, count: int, ctx: ptr32):
+    x = uint(ctx[0])
+    n = int(ctx[1])
+    color = int(ctx[2])
+    g = (color >> 16) & 0xFF
+    r = (color >> 8) & 0xFF
+    b = color & 0xFF
+    i = 0
+    while i < count:
+        x ^= x << 13
+        x ^= x >> 17
+        x ^= x << 5
+        idx = (int(x & 0xFFFF) * n) >> 16
+        lit[i] = idx
+        p = idx * 3
+        buf[p] = g
+        buf[p + 1] = r
+        buf[p + 2] = b
+        i += 1
+    ctx[0] = int(x)
+
+@micropython.viper
+def blank_lit(buf: ptr8, lit: ptr16, count: int):
+    i = 0
+    while i < count:
+        p = int(lit[i]) * 3
+        buf[p] = 0
+        buf[p + 1] = 0
+        buf[p + 2] = 0
+        i += 1
+
+# Stream mode RUNS payload (first LED u16, then count + G R B per run)
+# expanded into buf, stopping at its end
+@micropython.viper
+def fill_runs(buf: ptr8, size: int, runs: ptr8, length: int):
+    at = (runs[0] | (runs[1] << 8)) * 3
+    i = 2
+    while i + 4 <= length:
+        end = at + int(runs[i]) * 3
+        if end > size:
+            end = size
+        while at < end:
+            buf[at] = runs[i + 1]
+            buf[at + 1] = runs[i + 2]
+            buf[at + 2] = runs[i + 3]
+            at += 3
+        i += 4
+
+# ───────── OUTPUT ──────────────────────────────────────────────
+# np.write() always re-sends the whole strip, so effects only touch the
+# buffer and mark it dirty; show() skips the write when nothing changed.
+# `solid` is the colour the whole buffer holds, if it is just one.
+# Frame time runs from begin() to the end of show(), in µs.
+dirty = True
+solid = -1
+shows = skipped = 0
+frame_t0 = utime.ticks_us()
+ft_avg = ft_max = 0
+
+def begin():
+    global frame_t0
+    frame_t0 = utime.ticks_us()
+
+def changed():
+    global dirty, solid
+    dirty, solid = True, -1
+
+def paint(color):
+    global dirty, solid
+    if solid != color:
+        fill_buf(buf, NUM_LEDS, color)
+        dirty, solid = True, color
+
+def show():
+    global dirty, shows, skipped, ft_avg, ft_max
+    if dirty:
+        np.write()
+        dirty = False
+        shows += 1
+    else:
+        skipped += 1
+    took = utime.ticks_diff(utime.ticks_us(), frame_t0)
+    ft_avg += (took - ft_avg) >> 4
+    if took > ft_max:
+        ft_max = took
 
 # ───────── EFFECTS ─────────────────────────────────────────────
+# Each effect is a generator: every time the scheduler advances it, it
+# updates buf for the current frame (or leaves it alone) and yields. It
+# never sleeps or writes the strip, so it can be stopped between any two
+# frames. Timing comes from ticks_ms, not from counting frames.
+# `yield from` chains effects; layers run bottom to top every frame.
+# A generator is an allocation, so only an effect or a phase starting
+# makes one; waits inside a loop are inline ticks_ms deadlines.
+def blackout():
+    paint(BLACK)
+    yield
+
 def shimmer_green():
-    for i in range(NUM_LEDS):
-        g = urandom.getrandbits(8) % 120 + 60  # 60–180
-        np[i] = apply_brightness((0, g, 0))
-    np.write()
-
-def pulse_yellow_wave(delay=0.01):
-    col = apply_brightness((255, 255, 0))
-    # Light up from left to right
-    for i in range(NUM_LEDS):
-        np[i] = col
-        np.write()
-        utime.sleep(delay)
-    # Fade back out from right to left
-    for i in reversed(range(NUM_LEDS)):
-        np[i] = (0, 0, 0)
-        np.write()
-        utime.sleep(delay)
+    due = utime.ticks_ms()
+    while True:
+        if utime.ticks_diff(utime.ticks_ms(), due) >= 0:
+            shimmer_buf(buf, LUT, ctx)
+            changed()
+            due = utime.ticks_add(utime.ticks_ms(), 100)
+        yield
+
+# Light up from left to right, then fade back out from right to left,
+# delay_ms per LED however many LEDs fall in one frame
+def pulse_yellow_wave(delay_ms=10, color=None):
+    color = YELLOW if color is None else color
+    start = utime.ticks_ms()
+    done = 0
+    while done < 2 * NUM_LEDS:
+        step = min(2 * NUM_LEDS, utime.ticks_diff(utime.ticks_ms(), start) // delay_ms + 1)
+        while done < step:
+            if done < NUM_LEDS:
+                put_px(buf, done, color)
+            else:
+                put_px(buf, 2 * NUM_LEDS - 1 - done, BLACK)
+            done += 1
+        changed()
+        yield
 
 def paparazzi(run_time=1.5, density=0.25, flash_ms=60):
     end = utime.ticks_add(utime.ticks_ms(), int(run_time * 1000))
     n = max(1, int(NUM_LEDS * density))
+    paint(BLACK)
+    due = utime.ticks_ms()
     while utime.ticks_diff(end, utime.ticks_ms()) > 0:
-        fill((0, 0, 0))
-        for _ in range(n):
-            idx = urandom.getrandbits(16) % NUM_LEDS
-            np[idx] = apply_brightness((255, 255, 255))
-        np.write()
-        utime.sleep_ms(flash_ms)
-    fill((0, 0, 0))
-    np.write()
+        if utime.ticks_diff(utime.ticks_ms(), due) >= 0:
+            blank_lit(buf, lit, n)          # only the last flash's pixels
+            ctx[2] = WHITE
+            sparkle_buf(buf, lit, n, ctx)
+            changed()
+            due = utime.ticks_add(utime.ticks_ms(), flash_ms)
+        yield
+    paint(BLACK)
+    yield
 
-def celebrate(duration=8):
-    start_time = utime.ticks_ms()
-    while utime.ticks_diff(utime.ticks_ms(), start_time) < duration * 1000:
-        pulse_yellow_wave(delay=0.005)
-        paparazzi(run_time=1.5, density=0.3, flash_ms=50)
-    fill((0, 0, 0))
+def celebrate(duration_ms=8000, color=None):
+    end = utime.ticks_add(utime.ticks_ms(), duration_ms)
+    while utime.ticks_diff(end, utime.ticks_ms()) > 0:
+        yield from pulse_yellow_wave(delay_ms=5, color=color)
+        yield from paparazzi(run_time=1.5, density=0.3, flash_ms=50)
+    yield from blackout()
 
-# ───────── MAIN LOOP ──────────────────────────────────────────
-print("✅ Pico LED controller ready.")
+# Beat mode: the host streams LEVEL (0–255) and FLASH cues taken from
+# the clip's loudness envelope. beat() paints the level every frame; a
+# flash is a short white-sparkle layer on top (in any mode).
+BEAT_COLOR = (255, 180, 0)
+BEAT_FLOOR = 38            # glow kept at level 0 (of 255)
+FLASH_MS = 80
+beat_level = 0
+flash_lit = array.array('H', bytearray(2 * NUM_LEDS))
+
+def beat(color=BEAT_COLOR):
+    r, g, b = color
+    while True:
+        scale = BEAT_FLOOR + ((255 - BEAT_FLOOR) * beat_level >> 8)
+        paint(rgb(r * scale >> 8, g * scale >> 8, b * scale >> 8))
+        yield
+
+def flash(ms=FLASH_MS):
+    end = utime.ticks_add(utime.ticks_ms(), ms)
+    while utime.ticks_diff(end, utime.ticks_ms()) > 0:
+        ctx[2] = WHITE
+        sparkle_buf(buf, flash_lit, NUM_LEDS // 4, ctx)
+        changed()
+        yield
+
+# ───────── SCHEDULER ───────────────────────────────────────────
+# One frame every FRAME_MS: advance every layer, show() once. In between,
+# stdin is polled until the next frame is due, so a command lands within
+# one frame even mid-celebration. When the last layer of a celebration
+# finishes, idle resumes.
+FRAME_MS = 20
+layers = []                 # effect generators, drawn bottom to top
 current_mode = "idle"
 
-while True:
-    if current_mode == "idle":
-        shimmer_green()
-        utime.sleep_ms(100)
+def play(mode, *effects):
+    global current_mode, dirty, solid
+    current_mode = mode
+    layers[:] = effects
+    np.buf = buf                            # back from a streamed frame
+    dirty, solid = True, -1                 # the strip may show a streamed frame, not buf
 
-    if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-        line = sys.stdin.readline().strip()
-        if not line:
+def step():
+    begin()
+    i = 0
+    while i < len(layers):
+        try:
+            next(layers[i])
+            i += 1
+        except StopIteration:
+            layers.pop(i)
+    show()
+    if not layers and current_mode == "celebrate":
+        play("idle", shimmer_green())
+
+# ───────── SERIAL → RENDERER ───────────────────────────────────
+# Whichever core reads serial hands (type, payload) packets to the
+# renderer through a single-producer/single-consumer ring: the reader
+# only moves `head`, the renderer only moves `tail`, so neither ever
+# waits on a lock.
+RING = 16                   # power of two
+ring = [None] * RING
+head = tail = 0
+
+def post(kind, payload):
+    global head
+    nxt = (head + 1) & (RING - 1)
+    if nxt == tail:
+        return False
+    ring[head] = (kind, payload)
+    head = nxt
+    return True
+
+def drain():
+    global tail
+    while tail != head:
+        kind, payload = ring[tail]
+        tail = (tail + 1) & (RING - 1)
+        command(kind, payload)
+
+# Both cores write to USB (ACKs, print()s), one packet or line at a time
+out_lock = _thread.allocate_lock()
+
+def say(*args):
+    with out_lock:
+        print(*args)
+
+def reply(seq, status):
+    packet = proto.encode(proto.ACK, 0, bytes((seq, status)))
+    with out_lock:
+        sys.stdout.buffer.write(packet)
+
+# Stream mode: the host renders and sends SPAN packets (first LED + GRB
+# bytes, brightness applied) or RUNS packets (solid stretches as count +
+# colour) for the runs that changed, then SHOW. The
+# reader copies spans into the back buffer of a frame pair while the
+# renderer shows the front one; SHOW publishes the back buffer (ready +
+# published) and the renderer swaps it in (taken). Spans are deltas, so
+# before the next frame the reader waits for that swap and copies the
+# shown frame to the new back.
+# Each global has one writer: the reader (core 0) owns back, ready,
+# published, synced and streaming; the renderer (core 1) owns taken.
+frames = [bytearray(3 * NUM_LEDS), bytearray(3 * NUM_LEDS)]
+back = ready = 0
+published = taken = synced = 0
+streaming = False           # reader-side view of the mode
+
+def sync():
+    global back, synced
+    if synced == published:
+        return
+    while taken != published:               # renderer still swapping
+        utime.sleep_us(50)
+    back = ready ^ 1
+    frames[back][:] = frames[ready]
+    synced = published
+
+def put_span(payload):
+    at = (payload[0] | payload[1] << 8) * 3
+    data = memoryview(payload)[2:2 + max(0, len(frames[0]) - at)]
+    sync()
+    frames[back][at:at + len(data)] = data
+
+def put_runs(payload):
+    sync()
+    fill_runs(frames[back], len(frames[back]), payload, len(payload))
+
+def publish():
+    global ready, published
+    sync()
+    ready = back
+    published = (published + 1) & 0xFFFF
+
+def present():
+    global taken, dirty
+    p = published                           # read once: the reader may publish again meanwhile
+    if taken != p and current_mode == "stream":
+        begin()
+        np.buf = frames[ready]
+        dirty = True
+        show()
+    taken = p
+
+# Typed into the Pico's terminal: the same commands as text
+def text_command(line):
+    line = line.decode().strip()
+    if line.startswith("lv "):
+        return proto.LEVEL, bytes((min(255, max(0, int(line[3:]))),))
+    if line == "flash":
+        return proto.FLASH, b''
+    if line == "stats":
+        return proto.STATS, b''
+    if line == "repl":                      # Ctrl-C back on, drop to the REPL
+        micropython.kbd_intr(3)
+        raise SystemExit
+    if line in proto.EFFECTS:
+        return proto.PLAY, proto.play(proto.EFFECTS[line])
+    raise ValueError(line)
+
+# Reader side: stream packets are handled here, the rest go to the
+# renderer. An ACK means "valid and queued"; a resent packet (same seq as
+# the last acked one) is acked again but not run twice. The host numbers
+# its requests apart from other packets and PINGs when it connects, which
+# clears last_seq so a new session's first request can't look like a repeat.
+last_seq = -1
+
+def accept(kind, payload):
+    global streaming
+    if kind == proto.SPAN:
+        if streaming and len(payload) >= 2:
+            put_span(payload)
+        return proto.OK
+    if kind == proto.RUNS:
+        if streaming and len(payload) >= 2:
+            put_runs(payload)
+        return proto.OK
+    if kind == proto.SHOW:
+        if not streaming:
+            return proto.BAD                # host resends PLAY stream + a whole frame
+        publish()
+        return proto.OK
+    if kind == proto.PING:
+        return proto.OK
+    if kind == proto.PLAY:
+        if len(payload) != struct.calcsize(proto.PLAY_FMT):
+            return proto.BAD
+        streaming = payload[0] == proto.STREAM
+    elif kind == proto.LEVEL and not payload:
+        return proto.BAD
+    elif kind not in (proto.FLASH, proto.STATS):
+        return proto.UNKNOWN
+    return proto.OK if post(kind, payload) else proto.BUSY
+
+def receive(kind, seq, payload):
+    global last_seq
+    ack = False
+    if kind == proto.TEXT:
+        try:
+            kind, payload = text_command(payload)
+        except (ValueError, UnicodeError):
+            say("⚠️ Unknown command:", payload.decode('utf-8', 'ignore'))
+            return
+    else:
+        ack = kind & proto.ACK_REQ
+        kind &= 0x7F
+        if kind == proto.PING:
+            last_seq = -1                   # host (re)connected
+        elif ack and seq == last_seq:
+            reply(seq, proto.OK)
+            return
+    status = accept(kind, payload)
+    if ack:
+        last_seq = seq
+        reply(seq, status)
+
+def command(kind, payload):
+    global beat_level, ft_max, stats_shows, stats_t
+    if kind == proto.LEVEL:
+        beat_level = payload[0]
+        return
+    if kind == proto.FLASH:
+        ms = payload[0] | payload[1] << 8 if len(payload) >= 2 else 0
+        layers.append(flash(ms or FLASH_MS))
+        return
+    if kind == proto.STATS:
+        now = utime.ticks_ms()
+        fps = (shows - stats_shows) * 1000 // max(1, utime.ticks_diff(now, stats_t))
+        say("📊 shows:", shows, "skipped:", skipped, "fps:", fps,
+            "frame µs avg:", ft_avg, "max:", ft_max, "bad packets:", reader.errors, "dual core:", DUAL_CORE)
+        stats_shows, stats_t, ft_max = shows, now, 0
+        return
+
+    effect, duration_ms, r, g, b, level = struct.unpack(proto.PLAY_FMT, payload)
+    if level and level != int(BRIGHTNESS * 255 + 0.5):
+        set_brightness(level / 255)
+    color = (r, g, b) if r or g or b else None
+    if effect == proto.CELEBRATE:
+        play("celebrate", celebrate(duration_ms or 8000, color and rgb(*color)))
+    elif effect == proto.BEAT:
+        beat_level = 0
+        play("beat", beat(color or BEAT_COLOR))
+    elif effect == proto.IDLE:
+        play("idle", shimmer_green())
+    elif effect == proto.STREAM:
+        play("stream")
+    elif effect == proto.OFF:
+        play("off", blackout())
+    else:
+        say("⚠️ Unknown effect:", effect)
+    gc.collect()                            # on a command, not mid-effect
+
+stats_shows, stats_t = 0, utime.ticks_ms()
+
+# ───────── MAIN LOOP ──────────────────────────────────────────
+# The frame loop runs the scheduler, shows streamed frames and executes
+# queued commands. Single core, it polls serial while waiting for the
+# next frame. With DUAL_CORE it runs on core 1 and core 0 just blocks
+# on serial, so a long strip's np.write() never holds up the link.
+# Packets carry arbitrary bytes, so 0x03 must not mean Ctrl-C (send
+# "repl" as text to get the REPL back).
+stdin = select.poll()
+stdin.register(sys.stdin, select.POLLIN)
+reader = proto.Reader(sys.stdin.buffer.read)
+
+def read_serial(wait):
+    for _ in stdin.ipoll(wait):
+        receive(*reader.packet())
+        break
+
+def frame_loop(idle_wait):
+    next_frame = utime.ticks_ms()
+    while True:
+        drain()
+        present()
+        wait = utime.ticks_diff(next_frame, utime.ticks_ms())
+        if wait <= 0:
+            if layers:
+                step()
+            next_frame = utime.ticks_add(next_frame, FRAME_MS)
+            if utime.ticks_diff(utime.ticks_ms(), next_frame) > 0:
+                next_frame = utime.ticks_ms()   # fell behind: skip, don't rush
             continue
+        idle_wait(wait)
+
+def nap(wait):
+    utime.sleep_ms(1)                       # core 1: recheck ring + stream each ms
 
-        print(f"📥 Received: {line}")
-        if line == "celebrate":
-            current_mode = "celebrate"
-            celebrate()
-            current_mode = "idle"
-        elif line == "idle":
-            current_mode = "idle"
-        elif line == "off":
-            current_mode = "off"
-            off()
-        else:
-            print("⚠️ Unknown command:", line)
+print("✅ Pico LED controller ready.")
+micropython.kbd_intr(-1)
+play("idle", shimmer_green())
+gc.collect()
+if DUAL_CORE:
+    _thread.start_new_thread(frame_loop, (nap,))
+    while True:
+        read_serial(-1)
+else:
+    frame_loop(read_serial)
@@ -0,0 +1,33 @@
+from collections import deque
+
+# ───────── RUNNING STATS ───────────────────────────────────────────
+# Count / mean / max over everything seen, plus a window of recent values
+# for percentiles. Values are seconds unless the caller says otherwise.
+class Stat:
+    def __init__(self, name, window=512, unit='ms', scale=1000):
+        self.name, self.unit, self.scale = name, unit, scale
+        self.count, self.total, self.max = 0, 0.0, 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def __str__(self):
+        if not self.count:
+            return f"{self.name}: -"
+        s = self.scale
+        return (f"{self.name}: n={self.count} mean {self.mean * s:.1f} "
+                f"p95 {self.percentile(95) * s:.1f} max {self.max * s:.1f} {self.unit}")
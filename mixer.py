@@ -0,0 +1,97 @@
+import numpy as np
+
+# ───────── VOICES ──────────────────────────────────────────────────
+class Voice:
+    __slots__ = ('pcm', 'pos', 'gain', 'fade_in', 'fade_out', 'fade_left', 'at')
+
+    def __init__(self, pcm, gain=1.0, fade_in=0, at=None):
+        self.pcm, self.pos, self.gain, self.at = pcm, 0, gain, at
+        self.fade_in = fade_in              # frames of linear fade-in from pos 0
+        self.fade_out = 0                   # total fade-out frames, once stopping
+        self.fade_left = 0                  # fade-out frames still to play
+
+    @property
+    def done(self):
+        return self.pos >= len(self.pcm) or (self.fade_out and self.fade_left <= 0)
+
+# ───────── MIXER ───────────────────────────────────────────────────
+# Sums any number of int16 (frames, channels) voices into one block per
+# render() call, in float32, with per-voice gain and linear fades. A peak
+# limiter with smoothed release keeps the sum under `limit` (full scale =
+# 1.0) instead of hard-clipping when several loud clips pile up.
+class Mixer:
+    def __init__(self, period=256, channels=2, rate=44100, limit=0.98, release=0.2):
+        self.period, self.channels, self.rate = period, channels, rate
+        self.limit = limit * 32767
+        # per-block recovery factor so the limiter gain climbs back in `release` s
+        self.recover = np.exp(-period / (release * rate))
+        self.voices = []
+        self.gain = 1.0                     # current limiter gain
+        self._mix = np.zeros((period, channels), np.float32)
+        self._tmp = np.zeros((period, channels), np.float32)
+        self._env = np.zeros(period, np.float32)
+        self._ramp = np.arange(period, dtype=np.float32)
+        self._out = np.zeros((period, channels), np.int16)
+
+    def add(self, pcm, gain=1.0, fade_in=0.0, at=None):
+        voice = Voice(pcm, gain, int(fade_in * self.rate), at)
+        self.voices.append(voice)
+        return voice
+
+    def fade_out(self, voice, seconds):
+        frames = max(1, int(seconds * self.rate))
+        if not voice.fade_out or frames < voice.fade_left:
+            voice.fade_out = voice.fade_left = frames
+
+    def stop_all(self, fade=0.0):
+        if fade <= 0:
+            self.voices.clear()
+        for voice in self.voices:
+            self.fade_out(voice, fade)
+
+    def _envelope(self, voice, n):
+        env = self._env[:n]
+        env.fill(voice.gain)
+        if voice.pos < voice.fade_in:
+            env *= np.minimum(1.0, (voice.pos + self._ramp[:n]) / voice.fade_in)
+        if voice.fade_out:
+            done = voice.fade_out - voice.fade_left
+            env *= np.maximum(0.0, 1.0 - (done + self._ramp[:n]) / voice.fade_out)
+            voice.fade_left -= n
+        return env
+
+    # Returns (int16 block, `at` of every voice that started in it)
+    def render(self):
+        mix, tmp = self._mix, self._tmp
+        mix.fill(0)
+        started = []
+        for voice in self.voices:
+            chunk = voice.pcm[voice.pos:voice.pos + self.period]
+            n = len(chunk)
+            if voice.pos == 0:
+                started.append(voice.at)
+            if voice.pos >= voice.fade_in and not voice.fade_out:
+                if voice.gain == 1.0:
+                    mix[:n] += chunk
+                else:
+                    np.multiply(chunk, np.float32(voice.gain), out=tmp[:n])
+                    mix[:n] += tmp[:n]
+            else:
+                np.multiply(chunk, self._envelope(voice, n)[:, None], out=tmp[:n])
+                mix[:n] += tmp[:n]
+            voice.pos += n
+        self.voices = [v for v in self.voices if not v.done]
+
+        # Limiter: instant attack to the gain that fits this block's peak,
+        # exponential release, ramped across the block to avoid zipper noise
+        peak = float(np.abs(mix).max())
+        target = min(1.0, self.limit / peak) if peak else 1.0
+        new = min(target, 1.0 - (1.0 - self.gain) * self.recover)
+        if new != 1.0 or self.gain != 1.0:
+            ramp = self.gain + (new - self.gain) * (self._ramp + 1) / self.period
+            mix *= np.minimum(ramp, target)[:, None]
+        self.gain = new
+
+        np.clip(mix, -32768, 32767, out=mix)
+        self._out[:] = mix
+        return self._out, started
@@ -0,0 +1,91 @@
+import threading, time
+import serial
+import picoproto as proto
+from metrics import Stat
+
+# ───────── PICO LINK ───────────────────────────────────────────────
+# Host end of picoproto over the Pico's USB serial port. send() fires a
+# packet and forgets it (light cues, stream frames; seq 0); request() asks
+# for an ACK and resends with the same seq until one arrives or it runs out
+# of retries (the Pico re-acks a repeat without acting on it twice).
+# Requests count 1–255 on their own, so no amount of fire-and-forget
+# traffic in between can make a new request look like a repeat, and a
+# PING on connect makes the Pico forget the seq of a previous session. A reader
+# thread parses what comes back: ACKs wake the waiting request(), text
+# lines (the Pico's print()s) go to on_text.
+class PicoLink:
+    def __init__(self, port, baudrate=115200, timeout=0.25, retries=3, on_text=None):
+        self.port = serial.Serial(port, baudrate, timeout=0.1)
+        self.timeout, self.retries = timeout, retries
+        self.on_text = on_text
+        self.rtt = Stat("pico rtt")
+        self.packets = self.sent = self.resends = self.failed = 0
+        self.reader = proto.Reader(self._read)
+        self._seq = 0                       # last request seq
+        self._acks = {}                     # seq → [Event, status]
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._read_loop, daemon=True, name="pico-link")
+        self._thread.start()
+        self.send(proto.PING)               # hello: resets the Pico's last seq
+
+    @property
+    def is_open(self):
+        return not self._closed and self.port.is_open
+
+    def _read(self, n):
+        if self._closed:
+            raise EOFError
+        return self.port.read(n)            # short after the 0.1 s timeout
+
+    def _read_loop(self):
+        try:
+            while True:
+                kind, seq, payload = self.reader.packet()
+                if kind == proto.ACK and payload:
+                    waiter = self._acks.get(payload[0])
+                    if waiter:
+                        waiter[1] = payload[1] if len(payload) > 1 else proto.OK
+                        waiter[0].set()
+                elif kind == proto.TEXT and self.on_text:
+                    self.on_text(payload.decode('utf-8', 'replace'))
+        except (EOFError, OSError, serial.SerialException):
+            pass
+
+    def _send(self, type_, payload, seq=0):
+        packet = proto.encode(type_, seq, payload)
+        with self._lock:
+            self.port.write(packet)
+            self.packets += 1
+            self.sent += len(packet)
+
+    def send(self, type_, payload=b''):
+        self._send(type_, payload)
+
+    # True once the Pico has acknowledged it with OK
+    def request(self, type_, payload=b''):
+        with self._lock:
+            seq = self._seq = self._seq % 255 + 1
+        waiter = self._acks[seq] = [threading.Event(), None]
+        try:
+            for attempt in range(1 + self.retries):
+                if attempt:
+                    self.resends += 1
+                start = time.monotonic()
+                self._send(type_ | proto.ACK_REQ, payload, seq)
+                if waiter[0].wait(self.timeout):
+                    self.rtt.add(time.monotonic() - start)
+                    return waiter[1] == proto.OK
+            self.failed += 1
+            return False
+        finally:
+            self._acks.pop(seq, None)
+
+    def close(self):
+        self._closed = True
+        self._thread.join(1.0)              # reads time out every 0.1 s
+        self.port.close()
+
+    def __str__(self):
+        return (f"pico link: {self.packets} packets, {self.sent / 1024:.1f} KiB, "
+                f"{self.resends} resends, {self.failed} failed, {self.reader.errors} bad | {self.rtt}")
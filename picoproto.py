@@ -0,0 +1,113 @@
+# Binary packets between GolfCelebration.py and the Pico. Shared by both
+# sides, so it sticks to what MicroPython has (copy it next to main.py).
+#
+#   A5 5A | len u8 | type u8 | seq u8 | payload (len bytes) | crc16 u16 BE
+#
+# The CRC (CRC-16/CCITT-FALSE) covers len, type, seq and the payload. A
+# reader hunts for the A5 5A sync and drops anything that fails the CRC.
+# Bytes outside packets are plain text lines (print()s from the Pico, or
+# commands typed into its terminal), returned as TEXT.
+# type | ACK_REQ asks the other side for an ACK carrying the same seq.
+# Requests are numbered 1–255 on their own; other packets carry seq 0.
+import struct
+
+SYNC = b'\xa5\x5a'
+OVERHEAD = 7                # sync + len + type + seq + crc
+MAX_PAYLOAD = 255
+
+TEXT = 0                    # not sent: a text line read between packets
+ACK = 1                     # acked seq u8, status u8
+PING = 2
+PLAY = 3                    # effect u8, duration ms u16, r g b, brightness u8
+LEVEL = 4                   # level u8 (beat mode)
+FLASH = 5                   # ms u16
+SPAN = 6                    # first LED u16, GRB bytes (stream mode)
+SHOW = 7
+STATS = 8
+RUNS = 9                    # first LED u16, then runs of count u8 + GRB (stream mode)
+ACK_REQ = 0x80
+
+OK, UNKNOWN, BAD, BUSY = 0, 1, 2, 3
+
+# PLAY effects. Zero duration / colour / brightness = the Pico's default.
+IDLE, CELEBRATE, BEAT, OFF, STREAM = 0, 1, 2, 3, 4
+EFFECTS = {'idle': IDLE, 'celebrate': CELEBRATE, 'beat': BEAT, 'off': OFF, 'stream': STREAM}
+
+PLAY_FMT = '<BHBBBB'
+SPAN_LEDS = (MAX_PAYLOAD - 2) // 3       # LEDs per SPAN packet
+MAX_RUNS = (MAX_PAYLOAD - 2) // 4        # runs per RUNS packet
+
+# ───────── CRC ─────────────────────────────────────────────────────
+def _table():
+    t = []
+    for i in range(256):
+        c = i << 8
+        for _ in range(8):
+            c = ((c << 1) ^ 0x1021 if c & 0x8000 else c << 1) & 0xFFFF
+        t.append(c)
+    return t
+
+CRC_TABLE = _table()
+
+def crc16(data, crc=0xFFFF):
+    t = CRC_TABLE
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ t[(crc >> 8) ^ b]
+    return crc
+
+# ───────── PACKETS ─────────────────────────────────────────────────
+def encode(type_, seq, payload=b''):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError("payload too long")
+    head = bytes((len(payload), type_, seq & 0xFF))
+    crc = crc16(payload, crc16(head))
+    return SYNC + head + payload + bytes((crc >> 8, crc & 0xFF))
+
+def play(effect, duration_ms=0, color=(0, 0, 0), brightness=0):
+    return struct.pack(PLAY_FMT, effect, duration_ms, color[0], color[1], color[2], brightness)
+
+def span(first, grb):
+    return struct.pack('<H', first) + bytes(grb)
+
+# Reader over read(n), which returns up to n bytes: fewer only when it
+# timed out. packet() returns (type, seq, payload) for the next good
+# packet or text line. A bad or timed-out packet is counted in errors and
+# its bytes are rescanned for the next sync, so a corrupted length can't
+# swallow the packets after it.
+class Reader:
+    def __init__(self, read):
+        self.read = read
+        self.back = b''                     # bytes to rescan first
+        self.errors = 0
+
+    def take(self, n):
+        data = self.back[:n]
+        self.back = self.back[n:]
+        if len(data) < n:
+            data += self.read(n - len(data))
+        return data
+
+    def packet(self):
+        line = b''
+        while True:
+            b = self.take(1)
+            if not b:
+                continue
+            if b == SYNC[:1]:
+                s = self.take(1)
+                if s != SYNC[1:]:
+                    self.back = s + self.back
+                    continue
+                head = self.take(3)
+                body = self.take(head[0] + 2) if len(head) == 3 else b''
+                n = head[0] if head else 0
+                if len(body) == n + 2 and len(head) == 3:
+                    if crc16(body[:n], crc16(head)) == (body[n] << 8 | body[n + 1]):
+                        return head[1], head[2], body[:n]
+                self.errors += 1
+                self.back = head + body + self.back
+            elif b == b'\n':
+                if line:
+                    return TEXT, 0, line.rstrip(b'\r')
+            elif len(line) < MAX_PAYLOAD:
+                line += b
@@ -0,0 +1,81 @@
+import threading, time
+from array import array
+
+# Sample status codes stored alongside each reading
+OK, NO_ECHO, ERROR = 0, 1, 2
+
+# ───────── RING BUFFER ─────────────────────────────────────────────
+# Fixed-size, preallocated (timestamp, distance, status) columns. Writing
+# a sample only stores into existing slots, nothing is allocated. Every
+# sample gets a sequence number (= total written before it) so readers
+# can pick up exactly where they left off.
+class RingBuffer:
+    def __init__(self, size=1024):
+        self.size = size
+        self.t = array('d', bytes(8 * size))
+        self.dist = array('f', bytes(4 * size))
+        self.status = array('B', bytes(size))
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def append(self, t, dist, status):
+        with self._lock:
+            i = self.count % self.size
+            self.t[i] = t
+            self.dist[i] = dist
+            self.status[i] = status
+            self.count += 1
+
+    # Samples with sequence >= seq that are still in the buffer, plus the
+    # sequence to pass next time. Distance is None unless status is OK.
+    def since(self, seq):
+        with self._lock:
+            end = self.count
+            seq = max(seq, end - self.size)
+            out = []
+            for s in range(seq, end):
+                i = s % self.size
+                st = self.status[i]
+                out.append((self.t[i], self.dist[i] if st == OK else None, st))
+        return out, end
+
+    def latest(self):
+        with self._lock:
+            if not self.count:
+                return None
+            i = (self.count - 1) % self.size
+            st = self.status[i]
+            return self.t[i], self.dist[i] if st == OK else None, st
+
+    # Achieved samples/sec over the last `window` samples
+    def rate(self, window=64):
+        with self._lock:
+            n = min(window, self.count, self.size)
+            if n < 2:
+                return 0.0
+            first = self.t[(self.count - n) % self.size]
+            last = self.t[(self.count - 1) % self.size]
+        return (n - 1) / (last - first) if last > first else 0.0
+
+# ───────── SAMPLER ─────────────────────────────────────────────────
+# step() takes one sample and files it into the ring buffer (and the trace
+# recorder, if any). The app's sample_loop() calls it on a worker thread
+# every `period`; a replay calls it from a VirtualClock.
+class Sampler:
+    def __init__(self, read, buffer, rate_hz=15, clock=time.monotonic, recorder=None):
+        self.read, self.buffer, self.recorder = read, buffer, recorder
+        self.period = 1.0 / rate_hz
+        self.clock = clock
+
+    def step(self):
+        try:
+            d = self.read()
+            status = OK if d is not None else NO_ECHO
+        except EOFError:
+            raise
+        except Exception:
+            d, status = None, ERROR
+        t, d = self.clock(), d if d is not None else 0.0
+        self.buffer.append(t, d, status)
+        if self.recorder:
+            self.recorder.record(t, d, status)
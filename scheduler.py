@@ -0,0 +1,107 @@
+import threading
+
+# ───────── TIMED TASKS ─────────────────────────────────────────────
+class Task:
+    __slots__ = ('at', 'fn', 'cancelled')
+
+    def __init__(self, at, fn):
+        self.at, self.fn, self.cancelled = at, fn, False
+
+    def cancel(self):
+        self.cancelled = True
+
+# ───────── CELEBRATION SCHEDULER ───────────────────────────────────
+# A show is a set of cues (offset, fn) fired from trigger time, then end()
+# after `duration`. trigger() never blocks. While a show is running, a new
+# sink is handled by `policy`:
+#   'coalesce' – keep the current show as is
+#   'extend'   – re-fire the cues and push the end out a full duration
+#   'queue'    – play a full show for it once the current one ends
+# stop() cuts short anything a cue left running (e.g. the current clip).
+POLICIES = ('coalesce', 'extend', 'queue')
+
+class CelebrationScheduler:
+    def __init__(self, timers, cues, end, stop=None, duration=10, policy='extend'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown celebration policy: {policy!r}")
+        self.timers, self.cues, self.end, self.stop = timers, cues, end, stop
+        self.duration, self.policy = duration, policy
+        self.pending = 0
+        self.sinks = 0
+        self._tasks = []
+        self._end_task = None
+        self._show = 0                      # bumped per show; stale end cues bail out
+        self._lock = threading.RLock()
+
+    @property
+    def active(self):
+        return self._end_task is not None
+
+    def trigger(self):
+        with self._lock:
+            self.sinks += 1
+            if not self.active:
+                self._start()
+                return 'started'
+            if self.policy == 'extend':
+                self._cut()
+                self._start()
+                return 'extended'
+            if self.policy == 'queue':
+                self.pending += 1
+                return 'queued'
+            return 'coalesced'
+
+    def cancel(self):
+        with self._lock:
+            self.pending = 0
+            self._show += 1
+            was_active = self.active
+            self._cut()
+            if self._end_task:
+                self._end_task.cancel()
+                self._end_task = None
+        if was_active:
+            self.end()
+
+    def _start(self):
+        now = self.timers.time()
+        self._tasks = [self.timers.call_at(now + offset, fn) for offset, fn in self.cues]
+        if self._end_task:
+            self._end_task.cancel()
+        self._show += 1
+        show = self._show
+        self._end_task = self.timers.call_at(now + self.duration, lambda: self._finish(show))
+
+    def _cut(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self.stop:
+            self.stop()
+
+    def _finish(self, show):
+        with self._lock:
+            if show != self._show:
+                return
+            self._end_task = None
+            if self.pending:
+                self.pending -= 1
+                self._cut()
+                self._start()
+                return
+            self._tasks = []
+        self.end()
+
+# ───────── ASYNCIO ADAPTER ─────────────────────────────────────────
+# Lets a CelebrationScheduler run its cues on an asyncio event loop; the
+# TimerHandle loop.call_at() returns already has cancel().
+class LoopTimers:
+    def __init__(self, loop):
+        self.loop = loop
+
+    def time(self):
+        return self.loop.time()
+
+    def call_at(self, at, fn):
+        return self.loop.call_at(at, fn)
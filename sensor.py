@@ -0,0 +1,143 @@
+import threading, time
+
+# HC-SR04 range: round-trip echo width (s) × half the speed of sound (cm/s)
+CM_PER_SEC = 17150
+
+# ───────── SIMULATED GPIO ──────────────────────────────────────────
+# Drop-in stand-in for the bits of RPi.GPIO we use, wired to a fake
+# HC-SR04 so both measurement paths run on a box with no header pins.
+class SimulatedGPIO:
+    BCM, BOARD = 11, 10
+    OUT, IN = 0, 1
+    LOW, HIGH = 0, 1
+    RISING, FALLING, BOTH = 31, 32, 33
+
+    def __init__(self, trig=23, echo=19, distance_cm=lambda: 30.0, echo_delay=0.0005):
+        self.trig, self.echo = trig, echo
+        self.distance_cm = distance_cm      # callable → cm, or None for "no echo"
+        self.echo_delay = echo_delay        # burst time before ECHO goes high
+        self._levels = {}
+        self._callbacks = {}
+        self._pulse = None                  # (rise, fall) perf_counter times
+
+    def setwarnings(self, flag): pass
+    def setmode(self, mode): pass
+    def setup(self, pin, direction): self._levels.setdefault(pin, 0)
+
+    def input(self, pin):
+        if pin == self.echo and self._pulse:
+            rise, fall = self._pulse
+            return 1 if rise <= time.perf_counter() < fall else 0
+        return self._levels.get(pin, 0)
+
+    def output(self, pin, value):
+        was = self._levels.get(pin, 0)
+        self._levels[pin] = 1 if value else 0
+        if pin == self.trig and was and not value:   # falling edge fires a ping
+            d = self.distance_cm()
+            if d is not None:
+                rise = time.perf_counter() + self.echo_delay
+                self._pulse = (rise, rise + d / CM_PER_SEC)
+                threading.Thread(target=self._echo_edges, args=(self._pulse,),
+                                 daemon=True).start()
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if pin in self._callbacks:
+            raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+        self._callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        self._callbacks.pop(pin, None)
+
+    def cleanup(self, *pins):
+        self._callbacks.clear()
+        self._levels.clear()
+        self._pulse = None
+
+    # The pin level comes straight from the pulse times, so polling sees
+    # exact edges; callbacks get delivered late by this thread, as on a Pi.
+    def _echo_edges(self, pulse):
+        for at, edge in zip(pulse, (self.RISING, self.FALLING)):
+            time.sleep(max(0.0, at - time.perf_counter()))
+            edge_type, callback = self._callbacks.get(self.echo, (None, None))
+            if callback and edge_type in (self.BOTH, edge):
+                callback(self.echo)
+
+# ───────── POLLING MEASUREMENT ─────────────────────────────────────
+# The original busy-wait: spins on GPIO.input(ECHO) for the whole echo.
+class PollingSensor:
+    def __init__(self, gpio, trig, echo):
+        self.gpio, self.trig, self.echo = gpio, trig, echo
+        gpio.setup(trig, gpio.OUT)
+        gpio.setup(echo, gpio.IN)
+
+    def read(self, timeout=0.05, settle=0.05):
+        GPIO, ECHO = self.gpio, self.echo
+        GPIO.output(self.trig, False)
+        time.sleep(settle)
+        GPIO.output(self.trig, True); time.sleep(1e-5); GPIO.output(self.trig, False)
+
+        t0 = time.perf_counter()
+        while GPIO.input(ECHO) == 0:
+            if time.perf_counter() - t0 > timeout: return None
+        start = time.perf_counter()
+        while GPIO.input(ECHO) == 1:
+            if time.perf_counter() - start > timeout: return None
+        return (time.perf_counter() - start) * CM_PER_SEC
+
+    def close(self):
+        pass
+
+# ───────── EDGE-TIMED MEASUREMENT ──────────────────────────────────
+# Edge callbacks stamp rise/fall times; read() just blocks on an Event,
+# so a reading costs a couple of callbacks instead of a pinned core.
+# The stamps are taken when the callback thread gets to run, not when the
+# pin changed, so its wake-up latency lands in the width: cheaper than
+# polling but much noisier, hence not the default.
+class EdgeSensor:
+    def __init__(self, gpio, trig, echo):
+        self.gpio, self.trig, self.echo = gpio, trig, echo
+        gpio.setup(trig, gpio.OUT)
+        gpio.setup(echo, gpio.IN)
+        self._rise = self._width = None
+        self._armed = False
+        self._done = threading.Event()
+        gpio.add_event_detect(echo, gpio.BOTH, callback=self._on_edge)
+
+    def _on_edge(self, pin):
+        now = time.perf_counter()
+        if not self._armed:
+            return
+        # Edges alternate rise/fall after each ping; don't re-read the pin
+        # here, a short echo can already be low by the time we run.
+        if self._rise is None:
+            self._rise = now
+        else:
+            self._width = now - self._rise
+            self._armed = False
+            self._done.set()
+
+    def read(self, timeout=0.05, settle=0.05):
+        GPIO = self.gpio
+        GPIO.output(self.trig, False)
+        time.sleep(settle)
+        self._rise = self._width = None
+        self._done.clear()
+        self._armed = True
+        GPIO.output(self.trig, True); time.sleep(1e-5); GPIO.output(self.trig, False)
+
+        got = self._done.wait(2 * timeout)
+        self._armed = False
+        if not got or self._width > timeout:
+            return None
+        return self._width * CM_PER_SEC
+
+    def close(self):
+        self.gpio.remove_event_detect(self.echo)
+
+def make_sensor(mode, gpio, trig, echo):
+    if mode == 'edge':
+        return EdgeSensor(gpio, trig, echo)
+    if mode == 'poll':
+        return PollingSensor(gpio, trig, echo)
+    raise ValueError(f"Unknown sensor mode: {mode!r}")
@@ -0,0 +1,110 @@
+import heapq, itertools, struct
+import numpy as np
+from sampler import OK
+from scheduler import Task
+
+# ───────── FILE FORMAT ─────────────────────────────────────────────
+# 16-byte header, then fixed 16-byte little-endian records:
+#   header: magic b'GTRC', u16 version, u16 record size, 8 bytes reserved
+#   record: f64 timestamp (s), f32 distance (cm), u8 status, 3 pad bytes
+# Fixed-width records mean a trace can be np.memmap'ed as-is.
+MAGIC, VERSION = b'GTRC', 1
+HEADER = struct.Struct('<4sHH8x')
+RECORD = struct.Struct('<dfB3x')
+RECORD_DTYPE = np.dtype({'names': ['t', 'dist', 'status'],
+                         'formats': ['<f8', '<f4', 'u1'],
+                         'offsets': [0, 8, 12], 'itemsize': RECORD.size})
+
+class TraceRecorder:
+    def __init__(self, path, flush_every=64):
+        self.f = open(path, 'ab')
+        if self.f.tell() == 0:
+            self.f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._buf = bytearray(RECORD.size * flush_every)
+        self._n, self._cap = 0, flush_every
+
+    def record(self, t, dist, status):
+        RECORD.pack_into(self._buf, self._n * RECORD.size, t, dist, status)
+        self._n += 1
+        if self._n == self._cap:
+            self.flush()
+
+    def flush(self):
+        self.f.write(memoryview(self._buf)[:self._n * RECORD.size])
+        self.f.flush()
+        self._n = 0
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+def load_trace(path):
+    with open(path, 'rb') as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path} is not a v{VERSION} sensor trace")
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size)
+
+# ───────── CLOCKS ──────────────────────────────────────────────────
+# Discrete-event clock: time only moves inside sleep(), which runs every
+# callback that falls due on the way. A replay therefore runs as fast as
+# the CPU allows and gives the same result every run.
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.now = start
+        self._due = []
+        self._ids = itertools.count()
+
+    def time(self):
+        return self.now
+
+    def call_at(self, t, fn):
+        task = Task(t, fn)
+        heapq.heappush(self._due, (t, next(self._ids), task))
+        return task
+
+    def sleep(self, dt):
+        end = self.now + max(dt, 0.0)
+        while self._due and self._due[0][0] <= end:
+            t, _, task = heapq.heappop(self._due)
+            if not task.cancelled:
+                self.now = max(self.now, t)
+                task.fn()
+        self.now = end
+
+# ───────── REPLAY SENSOR ───────────────────────────────────────────
+# Stands in for a sensor: read() returns the next recorded distance.
+# schedule() arranges for step() (normally Sampler.step) to be called at
+# each recorded timestamp on a VirtualClock, starting from t = 0.
+class ReplaySensor:
+    def __init__(self, path):
+        self.trace = load_trace(path)
+        self.i = 0
+
+    @property
+    def done(self):
+        return self.i >= len(self.trace)
+
+    def read(self, timeout=0.05, settle=0.05):
+        if self.done:
+            raise EOFError("end of trace")
+        rec = self.trace[self.i]
+        self.i += 1
+        return float(rec['dist']) if rec['status'] == OK else None
+
+    def schedule(self, clock, step):
+        if self.done:
+            return
+        t = self.trace['t']
+        t0 = float(t[self.i])
+
+        def fire():
+            step()
+            if not self.done:
+                clock.call_at(float(t[self.i]) - t0 + start, fire)
+
+        start = clock.time()
+        clock.call_at(start, fire)
+
+    def close(self):
+        pass
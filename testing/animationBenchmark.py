@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# CPU per frame to drive a strip from a celebration timeline: rendered
+# live, played from a compiled timeline, and streamed from .gani files
+# (raw and delta) through write_raw(). Every path includes the
+# brightness/SPI encoding of a NullStrip, so the figures are what the
+# light thread would cost on the Pi. Also checks that every path puts
+# the same frames on the strip, and prints the file sizes.
+#   python3 testing/animationBenchmark.py [--leds 100 300] [--fps 60] [--seconds 10] [name ...]
+import os, sys, time, tempfile, argparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from leds import new_frame, NullStrip
+from timeline import load_timelines
+from animation import Animation, write_animation
+
+def cpu_per_frame(render, frames, fps):
+    t0 = time.process_time()
+    for i in range(frames):
+        render(i / fps)
+    return (time.process_time() - t0) / frames
+
+def paths(tl, n, fps, seconds, workdir):
+    strip, frame, scratch = NullStrip(n), new_frame(n), new_frame(n)
+    compiled = tl.compile(n, fps, seconds, cache_dir=None)
+    raw_path = os.path.join(workdir, f'{tl.name}-{n}.gani')
+    delta_path = os.path.join(workdir, f'{tl.name}-{n}-delta.gani')
+    write_animation(raw_path, compiled, n, fps, seconds)
+    write_animation(delta_path, compiled, n, fps, seconds, delta=True)
+    raw, delta = Animation(raw_path), Animation(delta_path)
+
+    def live(t):
+        tl.render(frame, t, scratch)
+        strip.write(frame)
+    def played(t):
+        compiled(frame, t)
+        strip.write(frame)
+    return strip, {
+        'live': live,
+        'compiled': played,
+        '.gani raw': lambda t: strip.write_raw(raw.grb(t)),
+        '.gani delta': lambda t: strip.write_raw(delta.grb(t)),
+    }, {'.gani raw': os.path.getsize(raw_path), '.gani delta': os.path.getsize(delta_path)}
+
+def same_output(strip, renders, frames, fps):
+    outs = []
+    for render in renders.values():
+        stream = []
+        for i in range(frames):
+            render(i / fps)
+            stream.append(strip.out.copy())
+        outs.append(np.array(stream))
+    return all(np.array_equal(outs[0], o) for o in outs[1:])
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('names', nargs='*')
+    ap.add_argument('--leds', type=int, nargs='+', default=[100, 300])
+    ap.add_argument('--fps', type=int, default=60)
+    ap.add_argument('--seconds', type=float, default=10)
+    args = ap.parse_args()
+    timelines = load_timelines()
+    frames = int(round(args.seconds * args.fps))
+    print(f"CPU per frame incl. SPI encoding, {frames} frames; 60 FPS budget is 16.7 ms\n")
+    print(f"{'timeline':>16} {'LEDs':>5} | {'live':>8} {'compiled':>9} {'gani raw':>9} {'gani delta':>10} | "
+          f"{'raw KiB':>8} {'delta KiB':>9} | same")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.names or timelines:
+            for n in args.leds:
+                strip, renders, sizes = paths(timelines[name], n, args.fps, args.seconds, workdir)
+                cost = {k: cpu_per_frame(r, frames, args.fps) for k, r in renders.items()}
+                ok = same_output(strip, renders, min(frames, 120), args.fps)
+                print(f"{name:>16} {n:5d} | " + " ".join(f"{cost[k] * 1e6:7.0f}µs" for k in renders)
+                      + f" | {sizes['.gani raw'] / 1024:8.0f} {sizes['.gani delta'] / 1024:9.0f} | "
+                      + ("✅" if ok else "❌"))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Exercise the persistent audio engine without a sound card: trigger a
+# clip every 100 ms into a real-time NullSink for each period size and
+# report trigger→audio latency and the engine's CPU share.
+#   python3 testing/audioEngineBenchmark.py [--seconds 3] [--wav out.wav]
+import os, sys, time, argparse
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from audio import Clip, RATE, CHANNELS
+from audioengine import AudioEngine, NullSink, WavFileSink
+
+def tone(freq=440, seconds=0.5):
+    t = np.arange(int(RATE * seconds)) / RATE
+    mono = (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16)
+    return Clip('tone', None, 'misc', np.repeat(mono[:, None], CHANNELS, axis=1), RATE)
+
+def run(period, seconds, periods=4):
+    engine = AudioEngine(NullSink(period=period, periods=periods), period)
+    clip = tone()
+    # the main thread mostly sleeps, so process CPU ≈ engine CPU
+    cpu0, start = time.process_time(), time.perf_counter()
+    engine.start()
+    while time.perf_counter() - start < seconds:
+        engine.play(clip)
+        time.sleep(0.1)
+    cpu = time.process_time() - cpu0
+    engine.close()
+    wall = time.perf_counter() - start
+    print(f"period {period:5d} ({1000 * period / RATE:5.1f} ms): {engine.latency} | "
+          f"{engine.blocks / wall:6.1f} blocks/s | process CPU {100 * cpu / wall:4.1f}%")
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--seconds', type=float, default=3.0)
+    ap.add_argument('--wav', help="also render a short overlay test to this WAV file")
+    args = ap.parse_args()
+
+    for period in (128, 256, 512, 1024):
+        run(period, args.seconds)
+
+    if args.wav:
+        engine = AudioEngine(WavFileSink(args.wav, realtime=True))
+        engine.start()
+        engine.play(tone(440, 1.0))
+        time.sleep(0.3)
+        engine.overlay(tone(660, 0.5))
+        time.sleep(1.0)
+        engine.close()
+        print(f"wrote {args.wav}")
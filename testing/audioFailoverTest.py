@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Fault injection for FailoverSink: the primary output disappears in the
+# middle of a clip, either failing outright (like aplay dying when a
+# Bluetooth speaker drops) or hanging (a stalled device). Checks that
+#   - audio moves to the pre-warmed secondary within a few periods,
+#   - no block is lost or repeated across the switch (the clip is a ramp,
+#     so the recorded output must be one continuous ramp),
+#   - play() on the celebration path never blocks meanwhile,
+#   - the primary is taken back once it returns.
+#   python3 testing/audioFailoverTest.py [--stall 0.25]
+import os, sys, time, threading, argparse
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from audio import Clip, RATE, CHANNELS
+from audioengine import AudioEngine, FailoverSink, NullSink
+
+# Real-time NullSink that keeps what it plays, with a timestamp per block
+class RecordingSink(NullSink):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.blocks = []
+
+    def write(self, block):
+        super().write(block)
+        self.blocks.append((time.monotonic(), block[:, 0].copy()))
+
+# Vanishes after `vanish_at` s of audio ('error' or 'stall'), and is
+# back `back_after` s later
+class FlakySink(RecordingSink):
+    def __init__(self, vanish_at, mode, back_after=1.0, **kw):
+        super().__init__(**kw)
+        self.vanish_frames, self.mode, self.back_after = int(vanish_at * RATE), mode, back_after
+        self.gone_at = self.vanished_at = None
+        self.recovered = False
+        self._unblock = threading.Event()
+
+    @property
+    def alive(self):
+        return self.gone_at is None
+
+    def write(self, block):
+        if self.gone_at is None and self.frames >= self.vanish_frames and not self.recovered:
+            self.gone_at = self.vanished_at = time.monotonic()
+        if self.gone_at is not None:
+            if self.mode == 'stall':
+                self._unblock.wait()
+            raise BrokenPipeError("device disappeared")
+        super().write(block)
+
+    def reopen(self):
+        if self.gone_at is not None and time.monotonic() - self.gone_at >= self.back_after:
+            self.gone_at, self.recovered = None, True
+            self._unblock.clear()
+            self.t0, self.frames = None, 0
+
+    def abort(self):
+        self._unblock.set()
+
+def run(mode, stall, period=256):
+    n = RATE * 4
+    ramp = (np.arange(n) % 30000).astype(np.int16)
+    clip = Clip('ramp', None, 'misc', np.repeat(ramp[:, None], CHANNELS, axis=1), RATE)
+
+    primary = FlakySink(0.5, mode, period=period)
+    secondary = RecordingSink(period=period)
+    sink = FailoverSink([('bluetooth', primary), ('usb', secondary)], stall=stall, retry=0.5)
+    engine = AudioEngine(sink, period)
+    engine.start()
+    engine.play(clip)
+
+    # the celebration path keeps calling play()/overlay() meanwhile
+    worst = 0.0
+    quiet = Clip('quiet', None, 'misc', np.zeros((period, CHANNELS), np.int16), RATE)
+    end = time.monotonic() + n / RATE + 0.3
+    while time.monotonic() < end:
+        t0 = time.perf_counter()
+        engine.overlay(quiet, 0.0)
+        worst = max(worst, time.perf_counter() - t0)
+        time.sleep(0.02)
+    engine.close()
+
+    # stitch the blocks back together in the order they were played
+    played = sorted(primary.blocks + secondary.blocks, key=lambda b: b[0])
+    out = np.concatenate([b for _, b in played])
+    start = int(np.flatnonzero(out)[0]) - 1 if out.any() else 0
+    audio = out[start:start + n].astype(np.int32)
+    steps = np.diff(audio)
+    continuous = len(audio) == n and np.all((steps == 1) | (steps == -29999))
+
+    first_secondary = secondary.blocks[0][0] if secondary.blocks else None
+    gone_at = primary.vanished_at
+    gap = (first_secondary - gone_at) if first_secondary and gone_at else None
+    back = any(to == 'bluetooth' for _, _, to in sink.switches)
+
+    checks = {
+        f"switched in < {stall + 0.1:.2f} s": gap is not None and gap < stall + 0.1,
+        "no lost/repeated audio": bool(continuous),
+        "play() never blocked (< 5 ms)": worst < 0.005,
+        "primary taken back": back,
+    }
+    print(f"\n{mode}: switches {[(f, t) for _, f, t in sink.switches]}")
+    print(f"  failover gap {gap * 1000 if gap else float('nan'):.1f} ms, "
+          f"worst play() {worst * 1e6:.0f} µs, {engine.latency}")
+    for name, ok in checks.items():
+        print(f"  {'PASS' if ok else 'FAIL'}  {name}")
+    return all(checks.values())
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--stall', type=float, default=0.25, help="watchdog timeout, s")
+    args = ap.parse_args()
+    ok = all([run('error', args.stall), run('stall', args.stall)])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Trigger-to-first-sample latency: the old per-clip `aplay` spawn versus
+# the preloaded AudioBank on the always-running AudioEngine.
+#   python3 testing/audioLatencyBenchmark.py [--dir /home/TestPi/golf_sounds]
+#
+# Old path: listdir + bash + `aplay -D null -s 1 clip`, which exits right
+# after writing its first period, so its run time is spawn + device open +
+# file read + first write. New path: what GolfCelebration.py does, pick +
+# engine.play() into a FailoverSink (a long-lived `aplay -D null`, then a
+# real-time NullSink); the engine measures trigger → first sample heard.
+import os, sys, time, shutil, statistics, subprocess, tempfile, wave, argparse
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from audio import AudioBank
+from audioengine import AudioEngine, AplaySink, FailoverSink, NullSink
+
+def tone_dir():
+    d = tempfile.mkdtemp()
+    t = np.arange(44100) / 44100
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype('<i2')
+    with wave.open(os.path.join(d, 'tone.wav'), 'wb') as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(44100)
+        w.writeframes(pcm.tobytes())
+    return d
+
+def report(name, times):
+    ms = [t * 1000 for t in times]
+    print(f"{name:>32}: median {statistics.median(ms):7.2f} ms  max {max(ms):7.2f} ms  (n={len(ms)})")
+
+def old_path(d, n):
+    if not shutil.which('aplay'):
+        print("aplay not installed; timing bash spawn alone as a lower bound")
+        cmd = "true"
+    else:
+        cmd = "aplay -q -D null -s 1 '{}'"
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        clips = [f for f in os.listdir(d) if f.endswith('.wav')]
+        subprocess.run(cmd.format(os.path.join(d, clips[0])), shell=True,
+                       executable="/bin/bash", stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        times.append(time.perf_counter() - t0)
+    return times
+
+def new_path(d, n, period):
+    t0 = time.perf_counter()
+    bank = AudioBank([d])
+    outputs = [('null', NullSink(period=period))]
+    if shutil.which('aplay'):
+        outputs.insert(0, ('aplay', AplaySink('null', period=period)))
+    engine = AudioEngine(FailoverSink(outputs), period)
+    engine.start()
+    print(f"startup: decoded {len(bank)} clips in {(time.perf_counter() - t0) * 1000:.0f} ms, "
+          f"playing to {engine.sink.name}")
+    for _ in range(n):
+        engine.play(bank.pick())
+        time.sleep(0.1)
+    engine.close()
+    return list(engine.latency.recent)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--dir', help="clip folder (default: a generated 1 s tone)")
+    ap.add_argument('-n', type=int, default=30)
+    ap.add_argument('--period', type=int, default=256)
+    args = ap.parse_args()
+    d = args.dir or tone_dir()
+
+    report("aplay per clip (before)", old_path(d, args.n))
+    report(f"bank + engine period {args.period} (after)", new_path(d, args.n, args.period))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Resident memory vs. clip-library size for three ways of holding clips:
+#   decoded  – AudioBank, every clip read into a NumPy array at startup
+#   mmap     – AudioBank(mmap=True) over a warm AudioCache, cache entries
+#              memory-mapped, small hot LRU
+#   music    – the original per-celebration pygame.mixer.music.load()
+# Each case runs in a fresh process: load the library, play `--plays`
+# random clips start to finish (mixed in faster than real time, so every
+# page of each played clip is touched), then report VmRSS / VmHWM.
+#   python3 testing/audioMemoryBenchmark.py [--sizes 25 100 250] [--seconds 3]
+import os, sys, json, time, random, shutil, tempfile, subprocess, argparse
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from audio import RATE, CHANNELS
+
+def rss():
+    with open('/proc/self/status') as f:
+        fields = dict(line.split(':', 1) for line in f)
+    return {k: int(fields[k].split()[0]) / 1024 for k in ('VmRSS', 'VmHWM')}
+
+def make_library(d, n, seconds):
+    import wave
+    rng = np.random.default_rng(1)
+    for i in range(n):
+        pcm = rng.integers(-8000, 8000, (int(RATE * seconds), CHANNELS), dtype=np.int16)
+        with wave.open(os.path.join(d, f'taunt{i:04d}.wav'), 'wb') as w:
+            w.setnchannels(CHANNELS); w.setsampwidth(2); w.setframerate(RATE)
+            w.writeframes(pcm.tobytes())
+
+def worker(mode, d, plays):
+    base = rss()['VmRSS']
+    t0 = time.perf_counter()
+    if mode == 'music':
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        import pygame
+        pygame.mixer.init(RATE, -16, CHANNELS, 512)
+        files = [os.path.join(d, f) for f in os.listdir(d) if f.endswith('.wav')]
+        startup = time.perf_counter() - t0
+        for _ in range(plays):
+            pygame.mixer.music.load(random.choice(files))
+            pygame.mixer.music.play()
+            time.sleep(0.05)
+            pygame.mixer.music.stop()
+    else:
+        from audio import AudioBank
+        from mixer import Mixer
+        from audiocache import AudioCache
+        cache = AudioCache(os.path.join(d, 'cache')) if mode == 'mmap' else None
+        bank = AudioBank([d], cache=cache, mmap=(mode == 'mmap'), resident=8)
+        startup = time.perf_counter() - t0
+        mixer = Mixer(1024)
+        for _ in range(plays):
+            voice = mixer.add(bank.pick().pcm)
+            while not voice.done:
+                mixer.render()
+    print(json.dumps(dict(rss(), base=base, startup=startup)))
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[25, 100, 250])
+    ap.add_argument('--seconds', type=float, default=3.0, help="length of each clip")
+    ap.add_argument('--plays', type=int, default=40)
+    ap.add_argument('--worker', nargs=2, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.plays)
+        sys.exit()
+
+    clip_mb = RATE * args.seconds * CHANNELS * 2 / 2**20
+    print(f"{args.seconds:.0f} s stereo clips ({clip_mb:.2f} MB each), {args.plays} plays per run\n")
+    print(f"{'clips':>6} {'library':>9} | {'mode':>8} {'RSS MB':>8} {'peak MB':>8} {'startup':>9}")
+    for n in args.sizes:
+        d = tempfile.mkdtemp()
+        try:
+            make_library(d, n, args.seconds)
+            from audio import AudioBank
+            from audiocache import AudioCache
+            AudioBank([d], cache=AudioCache(os.path.join(d, 'cache')))   # warm the cache
+            for mode in ('decoded', 'mmap', 'music'):
+                out = subprocess.run([sys.executable, __file__, '--plays', str(args.plays),
+                                      '--worker', mode, d], capture_output=True, text=True)
+                if out.returncode:
+                    print(f"{n:6d} {'':>9} | {mode:>8} failed: {out.stderr.strip().splitlines()[-1]}")
+                    continue
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n:6d} {n * clip_mb:7.0f}MB | {mode:>8} {r['VmRSS']:8.1f} "
+                      f"{r['VmHWM']:8.1f} {r['startup'] * 1000:7.0f}ms")
+        finally:
+            shutil.rmtree(d)
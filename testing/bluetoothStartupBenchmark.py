@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# Boot-to-first-sound for the Bluetooth speaker, against the scripted
+# stand-in for pactl/bluetoothctl (testing/fakeAudioTools.py):
+#   old – bluetoothSoundTest.py's sequence: restart pulseaudio with 1 s + 2 s
+#         sleeps, connect, sleep 3 s, then poll `pactl list` once a second
+#   new – AudioOutputManager: subscribe to sink events, connect once, play
+#         on the running audio engine the moment the sink shows up
+# Each is timed with the speaker already connected and from cold.
+#   python3 testing/bluetoothStartupBenchmark.py [--delay 1.5]
+import os, sys, time, tempfile, subprocess, argparse
+import numpy as np
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+from audio import Clip, RATE, CHANNELS
+from audioengine import AudioEngine, NullSink
+from audiooutput import AudioOutputManager
+
+MAC = "FC:58:FA:D7:0B:82"
+FAKE = [sys.executable, os.path.join(HERE, 'fakeAudioTools.py')]
+
+def tool(*args):
+    return subprocess.run(FAKE + list(args), stdout=subprocess.PIPE, text=True).stdout
+
+def reset(connected):
+    tool('reset', 'alsa_output.platform-bcm2835_audio.analog-stereo')
+    if connected:
+        tool('appear', MAC)
+
+def old_path():
+    t0 = time.monotonic()
+    time.sleep(1)                           # pulseaudio -k
+    time.sleep(2)                           # pulseaudio --start
+    if "Connected: yes" not in tool('bluetoothctl', 'info', MAC):
+        tool('bluetoothctl', 'connect', MAC)
+        time.sleep(3)
+    for _ in range(10):
+        if MAC.replace(':', '_') in tool('pactl', 'list', 'short', 'sinks'):
+            return time.monotonic() - t0
+        time.sleep(1)
+    return None
+
+def new_path():
+    beep = np.zeros((RATE // 10, CHANNELS), np.int16)
+    clip = Clip('beep', None, 'misc', beep, RATE)
+    engine = AudioEngine(NullSink())
+    engine.start()
+    t0 = time.monotonic()
+    manager = AudioOutputManager(MAC, pactl=FAKE + ['pactl'], bluetoothctl=FAKE + ['bluetoothctl'],
+                                 on_ready=lambda sink: (engine.reopen(), engine.play(clip, at=t0)))
+    manager.start()
+    ok = manager.wait(15)
+    while ok and not engine.latency.count:
+        time.sleep(0.001)
+    manager.close()
+    engine.close()
+    # latency samples are measured from t0, so the first one is boot → audible
+    return engine.latency.recent[0] if ok else None
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--delay', type=float, default=1.5, help="fake speaker connect time, s")
+    args = ap.parse_args()
+    os.environ['FAKE_AUDIO_DIR'] = tempfile.mkdtemp()
+    os.environ['FAKE_BT_DELAY'] = str(args.delay)
+
+    for connected in (True, False):
+        state = "already connected" if connected else f"cold ({args.delay:.1f} s connect)"
+        for name, fn in (('old', old_path), ('new', new_path)):
+            reset(connected)
+            t = fn()
+            print(f"{state:>24} | {name}: " + (f"{t * 1000:7.0f} ms to first sound" if t else "never ready"))
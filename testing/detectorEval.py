@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Score every detector on synthetic HC-SR04 traces: sinks caught, trigger
+# latency (samples after the ball lands) and false triggers per hour.
+#   python3 testing/detectorEval.py [--hours 2] [--seed 1]
+import os, sys, argparse
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from detect import DETECTORS, run_trace
+
+SAMPLE_HZ = 15
+
+# Empty hole reads ~15 cm with the odd short spike and dropout; a sunk ball
+# sits at ~3 cm for 1–4 s, with more dropouts while it rattles in.
+def synth_trace(hours, rng, sinks_per_min=2.0, spike_p=0.01, drop_p=0.03, ball_drop_p=0.3):
+    n = int(hours * 3600 * SAMPLE_HZ)
+    dists = rng.normal(15, 0.7, n)
+    spikes = rng.random(n) < spike_p
+    dists[spikes] = rng.uniform(1.5, 4.5, spikes.sum())
+
+    starts = np.sort(rng.choice(n - 60 * SAMPLE_HZ, int(hours * 60 * sinks_per_min), replace=False))
+    starts = starts[np.diff(starts, prepend=-10 ** 9) > 10 * SAMPLE_HZ]  # keep sinks ≥10 s apart
+    in_ball = np.zeros(n, dtype=bool)
+    for s in starts:
+        length = rng.integers(SAMPLE_HZ, 4 * SAMPLE_HZ)
+        dists[s:s + length] = rng.normal(3, 0.4, length)
+        in_ball[s:s + length] = True
+
+    drop = rng.random(n) < np.where(in_ball, ball_drop_p, drop_p)
+    dists[drop] = np.nan
+    return dists, starts, in_ball
+
+def score(fired, starts, in_ball, hours):
+    hits = np.flatnonzero(fired)
+    latencies, caught = [], 0
+    for s in starts:
+        during = hits[(hits >= s) & (hits < s + 10 * SAMPLE_HZ)]
+        if len(during) and in_ball[during[0]]:
+            caught += 1
+            latencies.append(during[0] - s + 1)
+    # a false trigger is a rising detector output with no ball present
+    rising = fired & ~np.concatenate([[False], fired[:-1]])
+    false = np.count_nonzero(rising & ~in_ball)
+    return caught, (np.mean(latencies) if latencies else float('nan')), false / hours
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--hours', type=float, default=2.0)
+    ap.add_argument('--seed', type=int, default=1)
+    args = ap.parse_args()
+
+    dists, starts, in_ball = synth_trace(args.hours, np.random.default_rng(args.seed))
+    print(f"{len(dists)} samples, {len(starts)} sinks @ {SAMPLE_HZ} Hz")
+    for kind in DETECTORS:
+        caught, latency, fp = score(run_trace(dists, kind), starts, in_ball, args.hours)
+        print(f"{kind:>10}: caught {caught:4d}/{len(starts)}  "
+              f"latency {latency:4.2f} samples  false {fp:6.1f}/h")
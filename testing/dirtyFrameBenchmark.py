@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# What dirty-frame tracking saves on the way out to the strip. Each effect
+# is rendered at LED_FPS for a while and written to:
+#   SPI       NullStrip, every frame vs. only frames that changed
+#   Pico      PicoStrip ("stream" mode over USB serial), whole frame every
+#             frame vs. only the changed spans of changed frames
+# The Pico side is replayed into a bytearray the way main.py applies SPAN
+# and RUNS packets, to check the strip ends up showing exactly the last frame.
+#   python3 testing/dirtyFrameBenchmark.py [--leds 100] [--fps 60] [--seconds 10]
+import os, sys, argparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import picoproto as proto
+from leds import new_frame, NullStrip, PicoStrip, Fairway, PulsePutt, Paparazzi, YellowWave, GRB
+from timeline import load_timelines
+
+SERIAL_KIB_S = 115200 / 10 / 1024       # 8N1: 10 bits a byte
+
+class FullFrames(PicoStrip):
+    def show(self, grb, prev):
+        return super().show(grb, None)
+
+class PicoReplay:
+    def __init__(self, n):
+        self.buf = bytearray(n * 3)
+
+    def __call__(self, kind, payload=b''):
+        if kind == proto.SPAN:
+            at = (payload[0] | payload[1] << 8) * 3
+            self.buf[at:at + len(payload) - 2] = payload[2:]
+        elif kind == proto.RUNS:
+            at = (payload[0] | payload[1] << 8) * 3
+            for i in range(2, len(payload) - 3, 4):
+                count = payload[i]
+                self.buf[at:at + 3 * count] = payload[i + 1:i + 4] * count
+                at += 3 * count
+
+def run(effect, n, fps, seconds):
+    frame = new_frame(n)
+    pico = PicoReplay(n)
+    strips = {'spi all': NullStrip(n, dedupe=False), 'spi dirty': NullStrip(n),
+              'pico all': FullFrames(n, lambda kind, payload=b'': None, dedupe=False, rle=False), 'pico spans': PicoStrip(n, pico)}
+    frames = int(seconds * fps)
+    for i in range(frames):
+        effect(frame, i / fps)
+        for strip in strips.values():
+            strip.write(frame)
+    ok = bytes(pico.buf) == strips['pico spans'].lut[frame[:, list(GRB)]].tobytes()
+    return frames, strips, ok
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--leds', type=int, default=100)
+    ap.add_argument('--fps', type=int, default=60)
+    ap.add_argument('--seconds', type=float, default=10)
+    args = ap.parse_args()
+    effects = {'fairway (idle)': Fairway(), 'pulse_putt': PulsePutt(), 'yellow_wave': YellowWave(),
+               'paparazzi': Paparazzi()}
+    for name, tl in load_timelines().items():
+        effects[name] = tl.compile(args.leds, args.fps, args.seconds, cache_dir=None)
+    print(f"{args.leds} LEDs at {args.fps} FPS; 115200 baud carries {SERIAL_KIB_S:.1f} KiB/s\n")
+    print(f"{'effect':>16} | {'shows/s':>7} {'SPI KiB/s':>14} | {'Pico KiB/s':>15} {'saved':>6} | Pico ok")
+    for name, effect in effects.items():
+        frames, s, ok = run(effect, args.leds, args.fps, args.seconds)
+        rate = lambda strip: strip.sent / args.seconds / 1024
+        shows = s['spi dirty'].shows / args.seconds
+        saved = 1 - s['pico spans'].sent / s['pico all'].sent
+        print(f"{name:>16} | {shows:7.1f} {rate(s['spi all']):6.1f} → {rate(s['spi dirty']):5.1f} | "
+              f"{rate(s['pico all']):6.1f} → {rate(s['pico spans']):6.1f} {saved:6.0%} | {'✅' if ok else '❌'}")
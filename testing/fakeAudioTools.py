@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Scripted stand-in for `pactl` and `bluetoothctl`, for testing the speaker
+# bring-up without a Pi or a speaker. State lives in $FAKE_AUDIO_DIR:
+#   sinks      – "index<TAB>name" lines, like `pactl list short sinks`
+#   events     – lines in `pactl subscribe` format, appended as sinks change
+#   connected  – MACs bluetoothctl has connected
+#   default    – last set-default-sink
+#
+#   fakeAudioTools.py pactl list short sinks | subscribe | set-default-sink NAME
+#   fakeAudioTools.py bluetoothctl info MAC | connect MAC
+#   fakeAudioTools.py reset [SINK ...]          # fresh state with these sinks
+#   fakeAudioTools.py drop MAC | appear MAC     # speaker vanishes / comes back
+# A connect makes the speaker's sink appear after $FAKE_BT_DELAY s (1.5).
+import os, sys, time, fcntl
+
+DIR = os.environ.get('FAKE_AUDIO_DIR', '/tmp/fake-audio')
+
+def path(name):
+    return os.path.join(DIR, name)
+
+def read_lines(name):
+    try:
+        with open(path(name)) as f:
+            return [l.rstrip('\n') for l in f if l.strip()]
+    except OSError:
+        return []
+
+def bt_sink(mac):
+    return f"bluez_sink.{mac.replace(':', '_')}.a2dp_sink"
+
+# Sinks + event log change together under one lock, like the real server
+def change(kind, name):
+    with open(path('lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sinks = [l.split('\t')[:2] for l in read_lines('sinks')]
+        if kind == 'new':
+            index = max([int(i) for i, _ in sinks] or [0]) + 1
+            sinks.append([str(index), name])
+        else:
+            match = [s for s in sinks if s[1] == name]
+            if not match:
+                return
+            index = int(match[0][0])
+            sinks.remove(match[0])
+        with open(path('sinks'), 'w') as f:
+            f.writelines(f"{i}\t{n}\tmodule-fake.c\ts16le 2ch 44100Hz\tIDLE\n" for i, n in sinks)
+        with open(path('events'), 'a') as f:
+            f.write(f"Event '{kind}' on sink #{index}\n")
+
+def pactl(args):
+    if args[:3] == ['list', 'short', 'sinks']:
+        for line in read_lines('sinks'):
+            print(line)
+    elif args[:1] == ['set-default-sink']:
+        with open(path('default'), 'w') as f:
+            f.write(args[1])
+    elif args[:1] == ['subscribe']:
+        with open(path('events')) as f:
+            f.seek(0, 2)
+            while True:
+                line = f.readline()
+                if line:
+                    sys.stdout.write(line)
+                    sys.stdout.flush()
+                else:
+                    time.sleep(0.005)
+
+def bluetoothctl(args):
+    mac = args[1]
+    if args[0] == 'info':
+        print(f"Device {mac}\n\tConnected: {'yes' if mac in read_lines('connected') else 'no'}")
+    elif args[0] == 'connect':
+        print(f"Attempting to connect to {mac}")
+        time.sleep(float(os.environ.get('FAKE_BT_DELAY', 1.5)))
+        appear(mac)
+        print("Connection successful")
+
+def appear(mac):
+    with open(path('connected'), 'a') as f:
+        f.write(mac + '\n')
+    change('new', bt_sink(mac))
+
+def drop(mac):
+    with open(path('connected'), 'w') as f:
+        f.writelines(m + '\n' for m in read_lines('connected') if m != mac)
+    change('remove', bt_sink(mac))
+
+if __name__ == '__main__':
+    cmd, args = sys.argv[1], sys.argv[2:]
+    os.makedirs(DIR, exist_ok=True)
+    if cmd == 'reset':
+        for name in ('sinks', 'events', 'connected', 'default'):
+            open(path(name), 'w').close()
+        for name in args:
+            change('new', name)
+    elif cmd == 'pactl':
+        pactl(args)
+    elif cmd == 'bluetoothctl':
+        bluetoothctl(args)
+    elif cmd == 'appear':
+        appear(args[0])
+    elif cmd == 'drop':
+        drop(args[0])
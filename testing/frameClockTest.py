@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Celebration length vs. NUM_LEDS. The strip is simulated with a show()
+# that takes the real WS2812 wire time (30 µs per LED).
+#   old – V9's pulse_putt() (fixed sleep per pixel on top of show()) then
+#         paparazzi(CELEB_SEC - 2); the pulse is timed over 100 steps and
+#         scaled to its 2·N steps
+#   new – the same celebration as leds.Sequence on a FrameClock
+#   python3 testing/frameClockTest.py [--celeb 4] [--fps 60]
+import os, sys, time, argparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from leds import FrameClock, new_frame, Sequence, PulsePutt, Paparazzi
+
+US_PER_LED = 30e-6
+
+def show(n):
+    end = time.perf_counter() + n * US_PER_LED
+    while time.perf_counter() < end:
+        pass
+
+def old_celebration(n, celeb):
+    delay = 2.0 / (2 * n)
+    t0 = time.perf_counter()
+    for _ in range(100):
+        show(n)
+        time.sleep(delay)
+    pulse = (time.perf_counter() - t0) / 100 * 2 * n
+    t0 = time.perf_counter()
+    end = time.time() + max(0, celeb - 2)
+    while time.time() < end:
+        show(n)
+        time.sleep(0.06)
+    show(n)
+    return pulse + time.perf_counter() - t0
+
+def new_celebration(n, celeb, fps):
+    frame = new_frame(n)
+    effect = Sequence((2, PulsePutt()), (None, Paparazzi()))
+    def render(t):
+        effect(frame, t)
+        show(n)
+    clock = FrameClock(fps)
+    t0 = time.perf_counter()
+    clock.run(render, celeb)
+    return time.perf_counter() - t0, clock
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--celeb', type=float, default=4.0, help="CELEB_SEC")
+    ap.add_argument('--fps', type=float, default=60)
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 300, 1000])
+    args = ap.parse_args()
+    print(f"CELEB_SEC = {args.celeb:.1f} s, {args.fps:.0f} FPS target\n")
+    for n in args.sizes:
+        old = old_celebration(n, args.celeb)
+        new, clock = new_celebration(n, args.celeb, args.fps)
+        print(f"{n:5d} LEDs | old {old:6.2f} s | new {new:6.3f} s  ({clock})")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Frame render time vs. NUM_LEDS: the per-pixel style of the
+# ultrasonicTest scripts (one setPixelColor-like call per LED, into a
+# Python list standing in for the strip) against leds.py (whole-frame NumPy
+# effects + brightness/GRB/SPI encoding of the finished frame). The
+# per-pixel figures flatter the old code: a real setPixelColor() is a
+# C-extension call per LED, and the strip encoding is not counted.
+#   python3 testing/ledRenderBenchmark.py [--sizes 100 300 1000 3000]
+import os, sys, time, random, argparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from leds import new_frame, Fairway, PulsePutt, Paparazzi, NullStrip
+
+def Color(r, g, b):
+    return (g << 16) | (r << 8) | b
+
+def old_frames(n):
+    strip = [0] * n
+    def strip_set(i, r, g, b): strip[i] = Color(r, g, b)
+    def strip_fill(r, g, b):
+        c = Color(r, g, b)
+        for i in range(n):
+            strip[i] = c
+    def fairway(t):
+        for i in range(n):
+            strip_set(i, 0, random.randint(60, 180), 0)
+    def pulse(t):
+        strip_fill(0, 0, 0)
+        strip_set(int(t * 100) % n, 255, 255, 0)
+    def paparazzi(t):
+        strip_fill(0, 0, 0)
+        for _ in range(max(1, int(n * 0.25))):
+            strip_set(random.randrange(n), 255, 255, 255)
+    return [fairway, pulse, paparazzi]
+
+def new_frames(n):
+    frame, strip = new_frame(n), NullStrip(n, dedupe=False)
+    def run(effect):
+        def render(t):
+            effect(frame, t)
+            strip.write(frame)
+        return render
+    return [run(Fairway()), run(PulsePutt()), run(Paparazzi())]
+
+def per_frame(renders, frames=300):
+    t0 = time.perf_counter()
+    for i in range(frames):
+        renders[i % 3](i / 60)
+    return (time.perf_counter() - t0) / frames
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 300, 1000, 3000])
+    args = ap.parse_args()
+    print("mean of fairway / pulse / paparazzi frames; 60 FPS budget is 16.7 ms\n")
+    print(f"{'NUM_LEDS':>8} | {'per-pixel':>10} {'max FPS':>8} | {'numpy+SPI':>10} {'max FPS':>8} | speed-up")
+    for n in args.sizes:
+        old, new = per_frame(old_frames(n)), per_frame(new_frames(n))
+        print(f"{n:8d} | {old * 1000:8.3f}ms {1 / old:8.0f} | {new * 1000:8.3f}ms {1 / new:8.0f} | {old / new:6.1f}x")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# How many simultaneous voices the NumPy mixer can carry: render blocks as
+# fast as possible and report the CPU share real-time playback would need.
+#   python3 testing/mixerBenchmark.py [--period 256] [--blocks 2000]
+import os, sys, time, argparse
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from mixer import Mixer
+
+RATE, CHANNELS = 44100, 2
+
+def clip(seconds, rng):
+    return (rng.standard_normal((int(RATE * seconds), CHANNELS)) * 6000).astype(np.int16)
+
+def run(voices, period, blocks, rng):
+    mixer = Mixer(period, CHANNELS, RATE)
+    clips = [clip(2.0, rng) for _ in range(4)]
+    # half the voices fading in or out at any time, like real overlapping cues
+    def top_up():
+        while len(mixer.voices) < voices:
+            v = mixer.add(clips[len(mixer.voices) % 4], gain=0.5, fade_in=0.2 * (len(mixer.voices) % 2))
+            if len(mixer.voices) % 4 == 0:
+                mixer.fade_out(v, 1.0)
+    top_up()
+    t0 = time.process_time()
+    for _ in range(blocks):
+        mixer.render()
+        top_up()
+    cpu = time.process_time() - t0
+    audio = blocks * period / RATE
+    return 100 * cpu / audio
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--period', type=int, default=256)
+    ap.add_argument('--blocks', type=int, default=2000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"period {args.period} frames ({1000 * args.period / RATE:.1f} ms)")
+    for voices in (1, 2, 4, 8, 16, 32, 64):
+        pct = run(voices, args.period, args.blocks, rng)
+        print(f"{voices:3d} voices: {pct:5.1f}% CPU for real time  "
+              f"({voices / pct if pct else float('inf'):5.2f} voices per CPU-%)")
@@ -0,0 +1,89 @@
+# Runs ON the Pico (MicroPython), with picoproto.py copied over:
+#   mpremote cp picoproto.py : + run testing/picoFpsBenchmark.py
+# Frame rate and command throughput for 100 / 300 / 600 LEDs, one core vs.
+# two. Each frame renders a full strip and np.write()s it; meanwhile the
+# serial side parses SPAN packets (a quarter of the strip per batch) the
+# way main.py's stream mode does. One core alternates the two; with _thread,
+# core 1 renders + writes while core 0 only decodes, as with DUAL_CORE.
+# The LEDs needn't be connected; np.write() takes the same time either way
+# (WS2812: 30 µs per LED, so 600 LEDs cap out near 55 FPS).
+import machine, neopixel, utime, micropython, _thread
+import picoproto as proto
+
+PIN_NUM = 0
+SECONDS = 3
+SIZES = (100, 300, 600)
+
+@micropython.viper
+def shade(buf: ptr8, n: int, k: int):
+    i = 0
+    while i < n * 3:
+        buf[i] = (i + k) & 0x3F
+        i += 1
+
+# a quarter of the strip as SPAN packets, read back through a Reader
+class Batch:
+    def __init__(self, n):
+        self.data = b''
+        for first in range(0, n // 4, proto.SPAN_LEDS):
+            count = min(proto.SPAN_LEDS, n // 4 - first)
+            self.data += proto.encode(proto.SPAN, 0, proto.span(first, b'\x3f' * (3 * count)))
+        self.pos = 0
+        self.reader = proto.Reader(self.read)
+
+    def read(self, k):
+        chunk = self.data[self.pos:self.pos + k]
+        self.pos += k
+        return chunk
+
+def decode(batch, back):
+    batch.pos = 0
+    while batch.pos < len(batch.data):
+        kind, seq, payload = batch.reader.packet()
+        at = (payload[0] | payload[1] << 8) * 3
+        back[at:at + len(payload) - 2] = payload[2:]
+
+def one_core(np, n, line, back):
+    frames = lines = 0
+    end = utime.ticks_add(utime.ticks_ms(), SECONDS * 1000)
+    while utime.ticks_diff(end, utime.ticks_ms()) > 0:
+        shade(np.buf, n, frames)
+        np.write()
+        frames += 1
+        decode(line, back)
+        lines += 1
+    return frames / SECONDS, lines / SECONDS
+
+state = [0, 0]              # [1 = run / 0 = stop / -1 = stopped, frames]
+
+def renderer(np, n):
+    frames = 0
+    while state[0] == 1:
+        shade(np.buf, n, frames)
+        np.write()
+        frames += 1
+    state[1] = frames
+    state[0] = -1
+
+def two_cores(np, n, line, back):
+    state[0], state[1] = 1, 0
+    _thread.start_new_thread(renderer, (np, n))
+    lines = 0
+    end = utime.ticks_add(utime.ticks_ms(), SECONDS * 1000)
+    while utime.ticks_diff(end, utime.ticks_ms()) > 0:
+        decode(line, back)
+        lines += 1
+    state[0] = 0
+    while state[0] != -1:
+        utime.sleep_ms(1)
+    return state[1] / SECONDS, lines / SECONDS
+
+print("LEDs | 1 core: FPS   batches/s | 2 cores: FPS   batches/s")
+for n in SIZES:
+    np = neopixel.NeoPixel(machine.Pin(PIN_NUM), n)
+    back, line = bytearray(3 * n), Batch(n)
+    f1, l1 = one_core(np, n, line, back)
+    f2, l2 = two_cores(np, n, line, back)
+    print("%4d | %11.0f %11.0f | %12.0f %11.0f" % (n, f1, l1, f2, l2))
+    np.fill((0, 0, 0))
+    np.write()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# picoproto over a pseudo-terminal, no Pico needed: PicoLink (the host
+# side GolfCelebration.py uses) talks to main.py's own packet handling
+# (receive/accept/command) run under CPython. main.py is loaded up to its
+# MAIN LOOP with small stand-ins for the MicroPython modules (machine,
+# neopixel, utime, urandom, micropython); its ACKs and print()s go back
+# over the pty. The strip is never drawn, only the link is measured.
+#   1. round trip: ACKed PINGs
+#   2. throughput: fire-and-forget SPAN packets (a pty has no baud
+#      limit, so also what a 115200 baud link allows)
+#   3. corruption: a byte flipped in some packets on the way in; the
+#      CRC must catch every one and the resends must get everything through
+#   4. dedupe: requests with 255 fire-and-forget packets between them
+#      (the old shared 8-bit seq wrapped onto the last request's), then a
+#      host restart whose first request reuses the last session's seq;
+#      every request must run exactly once
+#   python3 testing/picoLinkBenchmark.py [--pings 500] [--seconds 2] [--corrupt 0.05]
+import os, sys, pty, tty, time, types, random, select, threading, argparse
+import numpy as np
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+import picoproto as proto
+from picolink import PicoLink
+from leds import new_frame, PicoStrip, Paparazzi
+
+BAUD_BYTES = 115200 / 10
+
+def micropython_modules():
+    t0 = time.monotonic()
+    mods = {
+        'machine': {'Pin': lambda n: n},
+        'neopixel': {'NeoPixel': lambda pin, n: types.SimpleNamespace(buf=bytearray(3 * n), write=lambda: None)},
+        'utime': {'ticks_ms': lambda: int((time.monotonic() - t0) * 1000),
+                  'ticks_us': lambda: int((time.monotonic() - t0) * 1e6),
+                  'ticks_diff': lambda a, b: a - b, 'ticks_add': lambda a, b: a + b,
+                  'sleep_ms': lambda ms: time.sleep(ms / 1000), 'sleep_us': lambda us: time.sleep(us / 1e6)},
+        'urandom': {'getrandbits': random.getrandbits},
+        'micropython': {'viper': lambda f: f, 'kbd_intr': lambda c: None},
+    }
+    for name, attrs in mods.items():
+        sys.modules[name] = types.SimpleNamespace(**attrs)
+
+# A fresh copy of main.py's globals and functions, everything above MAIN LOOP
+def load_main(tx):
+    micropython_modules()
+    src = open(os.path.join(ROOT, 'main.py'), encoding='utf-8').read()
+    src = src[:src.index('# ───────── MAIN LOOP')]
+    pico = {'__name__': 'pico', 'ptr8': object, 'ptr16': object, 'ptr32': object}
+    exec(compile(src, 'main.py', 'exec'), pico)
+    out = types.SimpleNamespace(write=lambda data: os.write(tx, data))
+    pico['sys'] = types.SimpleNamespace(stdout=types.SimpleNamespace(buffer=out))
+    pico['print'] = lambda *args: os.write(tx, (' '.join(map(str, args)) + '\n').encode())
+    return pico
+
+class PicoThread(threading.Thread):
+    def __init__(self, rx, tx, corrupt=0.0):
+        super().__init__(daemon=True)
+        self.rx, self.corrupt = rx, corrupt
+        self.received = self.bytes = self.mangled = 0
+        self.plays = self.accepted = self.ran = 0   # ACKed PLAYs in, past dedupe, run
+        self.reader = proto.Reader(self.read)
+        self.main = load_main(tx)
+        self.main['reader'] = self.reader
+        # count what gets past main.py's dedupe and what it runs
+        accept, command = self.main['accept'], self.main['command']
+        def accepted(kind, payload):
+            self.accepted += kind == proto.PLAY
+            return accept(kind, payload)
+        def ran(kind, payload):
+            self.ran += kind == proto.PLAY
+            command(kind, payload)
+        self.main['accept'], self.main['command'] = accepted, ran
+
+    def read(self, n):
+        data = b''
+        while len(data) < n and select.select([self.rx], [], [], 0.02)[0]:
+            chunk = os.read(self.rx, n - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        self.bytes += len(data)
+        # flip one byte now and then, anywhere after the sync
+        if self.corrupt and n > 1 and random.random() < self.corrupt:
+            i = random.randrange(len(data))
+            data = data[:i] + bytes((data[i] ^ 0x5A,)) + data[i + 1:]
+            self.mangled += 1
+        return data
+
+    # main.py's single-core path: receive a packet, then run what it queued
+    def run(self):
+        try:
+            while True:
+                kind, seq, payload = self.reader.packet()
+                if kind != proto.TEXT:
+                    self.received += 1
+                    self.plays += kind == proto.PLAY | proto.ACK_REQ
+                self.main['receive'](kind, seq, payload)
+                self.main['drain']()
+        except (EOFError, OSError):
+            pass
+
+    @property
+    def repeats(self):
+        return self.plays - self.accepted
+
+def open_pair(corrupt=0.0):
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    pico = PicoThread(master, master, corrupt)
+    pico.start()
+    link = PicoLink(os.ttyname(slave), timeout=0.05, retries=5)
+    link.slave = slave
+    return link, pico
+
+def round_trip(pings):
+    link, pico = open_pair()
+    for _ in range(pings):
+        link.request(proto.PING)
+    link.close()
+    return link
+
+def throughput(seconds):
+    link, pico = open_pair()
+    payload = proto.span(0, bytes(3 * proto.SPAN_LEDS))
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        link.send(proto.SPAN, payload)
+    time.sleep(0.2)
+    link.close()
+    return pico.received / seconds, pico.bytes / seconds
+
+def corruption(count, rate):
+    link, pico = open_pair(rate)
+    ok = sum(link.request(proto.PING) for _ in range(count))
+    link.close()
+    return ok, link, pico
+
+def dedupe(count):
+    link, pico = open_pair()
+    play = proto.play(proto.IDLE)
+    ok = 0
+    for _ in range(count):
+        for _ in range(255):
+            link.send(proto.LEVEL, b'\x80')
+        ok += link.request(proto.PLAY, play)
+    for _ in range((1 - count) % 255):      # end the session on seq 1
+        link.request(proto.LEVEL, b'\x80')
+    link.close()
+    restart = PicoLink(os.ttyname(link.slave), timeout=0.05, retries=5)
+    for _ in range(count):                  # seq 1 again, as the last session's last
+        ok += restart.request(proto.PLAY, play)
+    restart.close()
+    return ok, pico
+
+def frame_bytes(n, effect, frames=300, fps=60):
+    sizes = []
+    strip = PicoStrip(n, lambda kind, payload=b'': sizes.append(proto.OVERHEAD + len(payload)))
+    frame = new_frame(n)
+    for i in range(frames):
+        effect(frame, i / fps)
+        strip.write(frame)
+    return sum(sizes[1:]) / frames                   # skip the PLAY(stream)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pings', type=int, default=500)
+    ap.add_argument('--seconds', type=float, default=2)
+    ap.add_argument('--corrupt', type=float, default=0.05)
+    args = ap.parse_args()
+
+    link = round_trip(args.pings)
+    print(f"1. round trip ({args.pings} ACKed PINGs over a pty): "
+          f"p50 {link.rtt.percentile(50) * 1000:.2f} ms, p95 {link.rtt.percentile(95) * 1000:.2f} ms, "
+          f"max {link.rtt.max * 1000:.2f} ms, {link.failed} failed")
+
+    pps, bps = throughput(args.seconds)
+    size = proto.OVERHEAD + 2 + 3 * proto.SPAN_LEDS
+    print(f"2. throughput ({proto.SPAN_LEDS}-LED SPAN packets, {size} B): {pps:,.0f} packets/s, "
+          f"{bps / 1024:,.0f} KiB/s over a pty; 115200 baud allows {BAUD_BYTES / size:.0f} packets/s")
+
+    ok, link, pico = corruption(args.pings, args.corrupt)
+    print(f"3. corruption ({args.corrupt:.0%} of reads mangled): {pico.mangled} mangled, "
+          f"{pico.reader.errors} caught by CRC, {link.resends} resends, {ok}/{args.pings} ACKed")
+
+    ok, pico = dedupe(20)
+    print(f"4. dedupe (20 requests 255 packets apart + 20 after a restart): {ok}/40 ACKed, "
+          f"{pico.ran}/40 run, {pico.repeats} dropped as repeats")
+
+    print("\nbytes per frame to a 100-LED Pico in stream mode (spans / runs + SHOW):")
+    rng = np.random.default_rng(1)
+    noise = lambda f, t: f.__setitem__(slice(None), rng.integers(0, 256, f.shape))
+    for name, effect in (('paparazzi', Paparazzi()), ('full change', noise)):
+        per = frame_bytes(100, effect)
+        print(f"  {name:>12}: {per:6.0f} B/frame → {BAUD_BYTES / per:5.0f} FPS max at 115200 baud")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# Compare CPU cost and jitter of the busy-wait vs. edge-timed HC-SR04 paths.
+#   python3 testing/sensorBenchmark.py            # simulated sensor at 30 cm
+#   python3 testing/sensorBenchmark.py --rpi      # real pins 23/19 on the Pi
+import os, sys, time, statistics, argparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sensor import SimulatedGPIO, make_sensor, CM_PER_SEC
+
+TRIG, ECHO = 23, 19
+
+def run(mode, gpio, n, settle):
+    sensor = make_sensor(mode, gpio, TRIG, ECHO)
+    readings, misses = [], 0
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for _ in range(n):
+        d = sensor.read(settle=settle)
+        if d is None: misses += 1
+        else: readings.append(d)
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    sensor.close()
+
+    # settle time is idle by design, so report CPU against the time spent measuring
+    active = max(wall - n * settle, 1e-9)
+    sd = statistics.pstdev(readings) if len(readings) > 1 else 0.0
+    print(f"{mode:>5}: {n} reads, {misses} misses | "
+          f"CPU {100 * cpu / wall:5.1f}% of wall, {100 * cpu / active:5.1f}% while measuring | "
+          f"mean {statistics.fmean(readings) if readings else 0:6.2f} cm, "
+          f"jitter σ {sd:5.2f} cm ({1e6 * sd / CM_PER_SEC:6.1f} µs)")
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', type=int, default=200)
+    ap.add_argument('--settle', type=float, default=0.01)
+    ap.add_argument('--distance', type=float, default=30.0)
+    ap.add_argument('--rpi', action='store_true', help="use RPi.GPIO instead of the simulator")
+    args = ap.parse_args()
+
+    if args.rpi:
+        import RPi.GPIO as GPIO
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+    else:
+        GPIO = SimulatedGPIO(TRIG, ECHO, distance_cm=lambda: args.distance)
+
+    for mode in ('poll', 'edge'):
+        run(mode, GPIO, args.n, args.settle)
+    GPIO.cleanup()
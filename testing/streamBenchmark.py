@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# How fast the Pi can stream rendered frames to the Pico (LED_BACKEND =
+# 'stream') for each effect style and strip length. Each effect is rendered
+# at --fps and written to PicoStrip three ways:
+#   full    every frame whole, raw GRB (3 bytes a LED + packet overhead)
+#   delta   changed frames only, changed spans only, raw GRB
+#   +rle    as delta, solid stretches sent as runs (RUNS packets)
+# B/frame is averaged over all rendered frames (a skipped frame costs 0).
+# ratio = full / +rle, and "FPS" is what the link could carry at that rate.
+# The link is counted at --baud (8N1); the Pico's USB CDC ignores the baud
+# setting and is faster, so these are floors. WS2812 caps a strip at about
+# 1 / (30 µs × LEDs) FPS however fast the link is.
+# The +rle stream is replayed the way main.py applies it to check it.
+#   python3 testing/streamBenchmark.py [--leds 60 100 300 600] [--fps 60] [--seconds 5] [--baud 115200]
+import os, sys, argparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from leds import new_frame, PicoStrip, Fairway, PulsePutt, Paparazzi, YellowWave, GRB
+from timeline import load_timelines
+from dirtyFrameBenchmark import PicoReplay, FullFrames
+
+def effects(n, fps, seconds):
+    out = {'fairway (idle)': Fairway(), 'pulse_putt': PulsePutt(), 'yellow_wave': YellowWave(),
+           'paparazzi': Paparazzi()}
+    for name, tl in load_timelines().items():
+        out[name] = tl.compile(n, fps, seconds, cache_dir=None)
+    return out
+
+def run(effect, n, fps, seconds):
+    frame = new_frame(n)
+    pico = PicoReplay(n)
+    ignore = lambda kind, payload=b'': None
+    strips = {'full': FullFrames(n, ignore, dedupe=False, rle=False),
+              'delta': PicoStrip(n, ignore, rle=False), '+rle': PicoStrip(n, pico)}
+    frames = int(seconds * fps)
+    for i in range(frames):
+        effect(frame, i / fps)
+        for strip in strips.values():
+            strip.write(frame)
+    ok = bytes(pico.buf) == strips['+rle'].lut[frame[:, list(GRB)]].tobytes()
+    return {name: strip.sent / frames for name, strip in strips.items()}, ok
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--leds', type=int, nargs='+', default=[60, 100, 300, 600])
+    ap.add_argument('--fps', type=int, default=60)
+    ap.add_argument('--seconds', type=float, default=5)
+    ap.add_argument('--baud', type=int, default=115200)
+    args = ap.parse_args()
+    link = args.baud / 10
+    print(f"rendered at {args.fps} FPS; {args.baud} baud carries {link / 1024:.1f} KiB/s")
+    for n in args.leds:
+        print(f"\n{n} LEDs (WS2812 max {1 / (30e-6 * n):.0f} FPS)")
+        print(f"{'effect':>16} | {'B/frame: full':>13} {'delta':>6} {'+rle':>6} {'ratio':>6} | "
+              f"{'FPS: full':>9} {'delta':>6} {'+rle':>6} | ok")
+        for name, effect in effects(n, args.fps, args.seconds).items():
+            size, ok = run(effect, n, args.fps, args.seconds)
+            fps = {k: link / v if v else float('inf') for k, v in size.items()}
+            print(f"{name:>16} | {size['full']:13.0f} {size['delta']:6.0f} {size['+rle']:6.0f} "
+                  f"{size['full'] / max(size['+rle'], 1):5.1f}x | "
+                  f"{fps['full']:9.0f} {fps['delta']:6.0f} {fps['+rle']:6.0f} | {'✅' if ok else '❌'}")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Declarative light shows. A timeline is a stack of layers, each an effect
+# from leds.py with a start, a length and a blend mode:
+#
+#   {"duration": 10,
+#    "layers": [
+#      {"effect": "pulse_putt", "duration": 2},
+#      {"effect": "paparazzi", "start": 2, "density": 0.3},
+#      {"effect": "fairway", "blend": "add", "opacity": 0.3, "every": 4, "duration": 1}]}
+#
+# Any other key on a layer is passed to the effect (colours as [r, g, b]).
+# "every" repeats the layer with that period; a missing "duration" runs it
+# to the end. Layers are composited bottom to top; with "over" (the
+# default) black pixels are transparent. compile() renders every
+# frame once into an (frames, N, 3) array, cached in memory and on disk
+# by a hash of the timeline, so playing it is just a frame copy. The hash
+# is salted with CACHE_VERSION and the source of leds.py + timeline.py,
+# so editing an effect re-renders; stale files are pruned on the next
+# save, and at most CACHE_KEEP are kept.
+# Named timelines live in celebrations.json.
+#
+#   python3 timeline.py [name ...] [--leds 100] [--fps 60]   # compile + time them
+import hashlib, json, os, time
+import numpy as np
+import leds
+from leds import new_frame, Fill, Fairway, PulsePutt, YellowWave, Paparazzi
+
+EFFECTS = {
+    'fill': Fill,
+    'fairway': Fairway,
+    'pulse_putt': PulsePutt,
+    'yellow_wave': YellowWave,
+    'paparazzi': Paparazzi,
+}
+BLENDS = ('over', 'add', 'max', 'multiply')
+LAYER_KEYS = ('effect', 'start', 'duration', 'every', 'blend', 'opacity')
+TIMELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'celebrations.json')
+CACHE_DIR = os.path.expanduser('~/.cache/minigolf-lights')
+CACHE_VERSION = 1
+CACHE_KEEP = 16
+
+def _code_salt():
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for path in (leds.__file__, __file__):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:8]
+
+CODE_SALT = _code_salt()
+
+# ───────── LAYERS ──────────────────────────────────────────────────
+class Layer:
+    def __init__(self, spec):
+        kind = spec.get('effect')
+        if kind not in EFFECTS:
+            raise ValueError(f"Unknown effect {kind!r} (have {', '.join(EFFECTS)})")
+        self.blend = spec.get('blend', 'over')
+        if self.blend not in BLENDS:
+            raise ValueError(f"Unknown blend {self.blend!r} (have {', '.join(BLENDS)})")
+        params = {k: v for k, v in spec.items() if k not in LAYER_KEYS}
+        self.effect = EFFECTS[kind](**params)
+        self.start = float(spec.get('start', 0))
+        self.duration = spec.get('duration')
+        self.every = spec.get('every')
+        self.opacity = float(spec.get('opacity', 1.0))
+
+    # Layer-local time at show time t, or None while the layer is off
+    def local(self, t):
+        t -= self.start
+        if t < 0:
+            return None
+        if self.every:
+            t %= self.every
+        if self.duration is not None and t >= self.duration:
+            return None
+        return t
+
+    def blend_into(self, out, layer):
+        a = self.opacity
+        if self.blend == 'over':
+            lit = layer.any(axis=1)
+            if a >= 1:
+                out[lit] = layer[lit]
+            else:
+                out[lit] = out[lit] + (layer[lit].astype(np.int16) - out[lit]) * a
+        elif self.blend == 'add':
+            np.minimum(out + layer * a, 255, out=out, casting='unsafe')
+        elif self.blend == 'max':
+            np.maximum(out, layer * a, out=out, casting='unsafe')
+        else:
+            out *= 1 - a + a * layer / 255
+
+# ───────── TIMELINE ────────────────────────────────────────────────
+class Timeline:
+    def __init__(self, spec, name=None):
+        self.spec, self.name = spec, name
+        self.duration = spec.get('duration')
+        self.layers = [Layer(l) for l in spec.get('layers', [])]
+
+    def key(self, n, fps, seconds):
+        blob = json.dumps([CODE_SALT, self.spec, n, fps, seconds], sort_keys=True).encode()
+        return f"{CODE_SALT}-{hashlib.sha256(blob).hexdigest()[:32]}"
+
+    # Composite the frame at show time t into `frame`
+    def render(self, frame, t, scratch=None):
+        out = np.zeros(frame.shape, np.float32)
+        scratch = new_frame(len(frame)) if scratch is None else scratch
+        for layer in self.layers:
+            lt = layer.local(t)
+            if lt is not None:
+                layer.effect(scratch, lt)
+                layer.blend_into(out, scratch)
+        frame[:] = out
+
+    def compile(self, n, fps=60, seconds=None, cache_dir=CACHE_DIR):
+        seconds = seconds or self.duration
+        if not seconds:
+            raise ValueError("Timeline needs a duration to compile")
+        key = self.key(n, fps, seconds)
+        if key in _compiled:
+            return _compiled[key]
+        path = os.path.join(cache_dir, key + '.npy') if cache_dir else None
+        try:
+            frames = np.load(path, mmap_mode='r')
+            os.utime(path)                  # most recently used survives prune()
+        except (OSError, ValueError, TypeError):
+            frames = np.empty((int(round(seconds * fps)), n, 3), np.uint8)
+            scratch = new_frame(n)
+            for i in range(len(frames)):
+                self.render(frames[i], i / fps, scratch)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    np.save(f, frames)
+                os.replace(path + '.tmp', path)
+                prune(cache_dir)
+        _compiled[key] = Compiled(frames, fps, self.name)
+        return _compiled[key]
+
+_compiled = {}                              # key → Compiled, for this process
+
+# Drops frames rendered by other code (another CODE_SALT) and all but the
+# CACHE_KEEP most recently used of the rest
+def prune(cache_dir=CACHE_DIR, keep=CACHE_KEEP):
+    live = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if not name.endswith('.npy'):
+            continue
+        if name.startswith(CODE_SALT + '-'):
+            live.append((os.path.getmtime(path), path))
+        else:
+            os.remove(path)
+    for _, path in sorted(live, reverse=True)[keep:]:
+        os.remove(path)
+
+# A compiled timeline is itself an effect: playing it copies one frame
+class Compiled:
+    def __init__(self, frames, fps, name=None):
+        self.frames, self.fps, self.name = frames, fps, name
+
+    @property
+    def duration(self):
+        return len(self.frames) / self.fps
+
+    def __call__(self, frame, t):
+        frame[:] = self.frames[min(int(t * self.fps), len(self.frames) - 1)]
+
+def load_timelines(path=TIMELINES_FILE):
+    with open(path) as f:
+        return {name: Timeline(spec, name) for name, spec in json.load(f).items()}
+
+if __name__ == '__main__':
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument('names', nargs='*')
+    ap.add_argument('--leds', type=int, default=100)
+    ap.add_argument('--fps', type=int, default=60)
+    ap.add_argument('--seconds', type=float, default=10)
+    args = ap.parse_args()
+    timelines = load_timelines()
+    frame = new_frame(args.leds)
+    for name in args.names or timelines:
+        tl = timelines[name]
+        t0 = time.perf_counter()
+        show = tl.compile(args.leds, args.fps, args.seconds, cache_dir=None)
+        built = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for i in range(len(show.frames)):
+            tl.render(frame, i / args.fps)
+        live = (time.perf_counter() - t0) / len(show.frames)
+        t0 = time.perf_counter()
+        for i in range(len(show.frames)):
+            show(frame, i / args.fps)
+        played = (time.perf_counter() - t0) / len(show.frames)
+        print(f"{name:>12}: {len(show.frames)} frames, {show.frames.nbytes / 2**20:.2f} MB, "
+              f"compiled in {built * 1000:.0f} ms | per frame: live {live * 1e6:.0f} µs, "
+              f"compiled {played * 1e6:.1f} µs")